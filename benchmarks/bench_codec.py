@@ -0,0 +1,68 @@
+"""Microbenchmarks for the RS-WFIREX4 wire codec.
+
+Run from the repository root:
+
+    python benchmarks/bench_codec.py
+
+Only the standard library is needed; the codec module is loaded directly so
+Home Assistant does not have to be installed.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import timeit
+from pathlib import Path
+
+PACKAGE_DIR = Path(__file__).resolve().parents[1] / "custom_components" / "rs_wfirex4"
+sys.path.insert(0, str(PACKAGE_DIR))
+
+import codec  # noqa: E402
+
+# Typical learned AC code sizes in bytes.
+SIZES = (64, 300, 1200)
+
+
+def _legacy_crc8(payload_buf: bytes) -> int:
+    """CRC8 as Wfirex4Remote.crc8_calc did it (table rebuilt per call)."""
+    table = list(codec._CRC8_TABLE)
+    crc = 0
+    for i in range(len(payload_buf)):
+        crc = table[(crc ^ payload_buf[i]) % 256]
+    return crc
+
+
+def _bench(label: str, func, number: int) -> None:
+    seconds = min(timeit.repeat(func, number=number, repeat=5)) / number
+    print(f"  {label:<34} {seconds * 1e6:10.2f} us")
+
+
+def main() -> None:
+    """Print per-call timings for each codec operation."""
+    for size in SIZES:
+        wave = os.urandom(size)
+        frame = codec.encode_ir_frame(wave)
+        stream = frame * 20
+        number = max(200, 200_000 // size)
+
+        print(f"payload {size} bytes")
+        _bench("crc8 (legacy)", lambda: _legacy_crc8(wave), number)
+        _bench("crc8", lambda: codec.crc8(wave), number)
+        _bench("encode_ir_frame", lambda: codec.encode_ir_frame(wave), number)
+        _bench(
+            "FrameParser.feed (whole frame)",
+            lambda: codec.FrameParser().feed(frame),
+            number,
+        )
+
+        def feed_chunks():
+            parser = codec.FrameParser()
+            for i in range(0, len(stream), 256):
+                parser.feed(stream[i : i + 256])
+
+        _bench("FrameParser.feed (20 frames/256B)", feed_chunks, max(10, number // 20))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""Fleet-scale load harness for the RS-WFIREX4 integration.
+
+Starts N emulated units on loopback, boots a minimal throwaway Home
+Assistant (core and registries only, no frontend) with this integration
+linked into its config dir, adds one config
+entry per unit (so `async_setup_entry` runs for real), then drives sends and
+polls across the fleet. Reports, per phase:
+
+* wall-clock time;
+* event-loop lag (how late a 10 ms sleeper wakes up: p50/p99/max);
+* peak RSS and RSS growth per device;
+* live objects per device (remotes, fetchers, coordinators, sensors, stores).
+
+Run from the repository root (Home Assistant must be installed):
+
+    python benchmarks/bench_fleet.py --count 200
+    python benchmarks/bench_fleet.py --count 500 --latency 0.01 --rounds 5
+
+Units beyond 250 use further 127.0.x.0/24 blocks; Linux routes all of
+127.0.0.0/8 to loopback, other systems may need aliases.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from emulator import (  # noqa: E402
+    DEFAULT_PORT,
+    EmulatorConfig,
+    Wfirex4Emulator,
+    start_fleet,
+)
+from homeassistant import bootstrap, loader  # noqa: E402
+from homeassistant import config as conf_util  # noqa: E402
+from homeassistant.config_entries import SOURCE_IMPORT, ConfigEntries  # noqa: E402
+from homeassistant.const import CONF_HOST, CONF_MAC, CONF_NAME  # noqa: E402
+from homeassistant.core import HomeAssistant  # noqa: E402
+from homeassistant.helpers.storage import Store  # noqa: E402
+from homeassistant.setup import async_setup_component  # noqa: E402
+
+DOMAIN = "rs_wfirex4"
+LAG_TICK = 0.01  # Seconds between event-loop lag samples.
+IR_CODE = bytes(300).hex()  # A typical learned AC code, sent as raw hex.
+
+# Per-device object types to count, by class name.
+TRACKED_TYPES = (
+    "Wfirex4Remote",
+    "Wfirex4Fetcher",
+    "DataUpdateCoordinator",
+    "WfirexCoordinatorSensor",
+    "WfirexMetricSensor",
+    "Wfirex4Connection",
+)
+
+
+class LagMonitor:
+    """Sample how late the event loop wakes a periodic sleeper."""
+
+    def __init__(self) -> None:
+        """Initialize an idle monitor."""
+        self.samples: list[float] = []
+        self._task: asyncio.Task | None = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(LAG_TICK)
+            self.samples.append(max(loop.time() - start - LAG_TICK, 0.0))
+
+    @asynccontextmanager
+    async def measure(self):
+        """Collect lag samples for the duration of the block."""
+        self.samples = []
+        self._task = asyncio.create_task(self._run())
+        try:
+            yield self
+        finally:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    def summary(self) -> str:
+        """Return p50/p99/max lag in milliseconds."""
+        if len(self.samples) < 2:
+            return "lag n/a (phase too short)"
+        cuts = statistics.quantiles(self.samples, n=100, method="inclusive")
+        return (
+            f"lag p50 {cuts[49] * 1000:6.2f} ms  p99 {cuts[98] * 1000:6.2f} ms  "
+            f"max {max(self.samples) * 1000:6.2f} ms"
+        )
+
+
+def _rss_mib() -> float:
+    """Return the peak resident set size of this process in MiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes.
+    return peak / 1024 / (1024 if sys.platform == "darwin" else 1)
+
+
+def _count_objects() -> Counter:
+    gc.collect()
+    counts: Counter = Counter()
+    for obj in gc.get_objects():
+        name = type(obj).__name__
+        if name in TRACKED_TYPES:
+            counts[name] += 1
+        elif isinstance(obj, Store):
+            counts["Store"] += 1
+    return counts
+
+
+async def _start_hass(config_dir: Path) -> HomeAssistant:
+    """Boot a minimal Home Assistant with this integration linked in.
+
+    Full bootstrap would also load the frontend and its dependencies; only
+    the core, the registries and config entries are needed here.
+    """
+    (config_dir / "custom_components").mkdir()
+    (config_dir / "custom_components" / DOMAIN).symlink_to(
+        REPO_DIR / "custom_components" / DOMAIN, target_is_directory=True
+    )
+    sys.path.insert(0, str(config_dir))  # Custom integrations import from here.
+
+    hass = HomeAssistant(str(config_dir))
+    hass.config.skip_pip = True
+    loader.async_setup(hass)
+    hass.config_entries = ConfigEntries(hass, {})
+    await bootstrap.async_load_base_functionality(hass)
+    await conf_util.async_process_ha_core_config(hass, {"name": "Fleet"})
+    if not await async_setup_component(hass, "homeassistant", {}):
+        raise RuntimeError("Home Assistant failed to boot")
+    await hass.async_start()
+    return hass
+
+
+async def _add_entry(hass: HomeAssistant, index: int, unit: Wfirex4Emulator):
+    """Create the entry of one unit; the import flow awaits its setup."""
+    mac = "00:1c:c2:" + ":".join(f"{index >> s & 0xFF:02x}" for s in (16, 8, 0))
+    start = time.perf_counter()
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN,
+        context={"source": SOURCE_IMPORT},
+        data={CONF_HOST: unit.host, CONF_MAC: mac, CONF_NAME: f"Fleet {index}"},
+    )
+    if result["type"] != "create_entry":
+        raise RuntimeError(f"{unit.host}: {result.get('reason', result['type'])}")
+    return time.perf_counter() - start
+
+
+async def _drive_sends(hass: HomeAssistant, rounds: int) -> int:
+    remotes = [
+        state.entity_id
+        for state in hass.states.async_all("remote")
+        if state.entity_id.startswith("remote.fleet_")
+    ]
+    for _ in range(rounds):
+        await asyncio.gather(
+            *(
+                hass.services.async_call(
+                    "remote",
+                    "send_command",
+                    {"entity_id": entity_id, "command": IR_CODE},
+                    blocking=True,
+                )
+                for entity_id in remotes
+            )
+        )
+    return len(remotes) * rounds
+
+
+async def _drive_polls(hass: HomeAssistant, rounds: int) -> int:
+    fetchers = hass.data[DOMAIN]["fetchers"]
+    coordinators = hass.data[DOMAIN]["coordinators"]
+    for _ in range(rounds):
+        # Fetchers rate-limit to their scan interval and setup just seeded
+        # them; clear that so every refresh goes to the device.
+        for fetcher in fetchers.values():
+            fetcher._last_fetch_time = 0
+        await asyncio.gather(*(c.async_refresh() for c in coordinators.values()))
+    return len(coordinators) * rounds
+
+
+def _report(label: str, wall: float, lag: LagMonitor, extra: str = "") -> None:
+    print(f"{label:<8} wall {wall * 1000:9.1f} ms  {lag.summary()}  {extra}")
+
+
+async def _main(args: argparse.Namespace) -> None:
+    config = EmulatorConfig(latency=args.latency, jitter=args.jitter)
+    # The integration always dials the device port, so the fleet listens on
+    # it too (each unit on its own loopback address).
+    units = await start_fleet(args.count, DEFAULT_PORT, config)
+    print(f"{len(units)} emulated units on port {units[0].port}")
+
+    with tempfile.TemporaryDirectory(prefix="wfirex4-fleet-") as tmp:
+        hass = await _start_hass(Path(tmp))
+        baseline_rss = _rss_mib()
+        baseline_objects = _count_objects()
+        lag = LagMonitor()
+
+        async with lag.measure():
+            start = time.perf_counter()
+            samples = await asyncio.gather(
+                *(_add_entry(hass, i, unit) for i, unit in enumerate(units))
+            )
+            await hass.async_block_till_done()
+            wall = time.perf_counter() - start
+        _report(
+            "setup",
+            wall,
+            lag,
+            f"per entry p50 {statistics.median(samples) * 1000:.1f} ms  "
+            f"max {max(samples) * 1000:.1f} ms",
+        )
+
+        async with lag.measure():
+            frames = sum(unit.stats.ir_frames for unit in units)
+            start = time.perf_counter()
+            sent = await _drive_sends(hass, args.rounds)
+            wall = time.perf_counter() - start
+            frames = sum(unit.stats.ir_frames for unit in units) - frames
+        _report(
+            "sends", wall, lag, f"{sent / wall:.0f} sends/s  ({frames} frames seen)"
+        )
+
+        async with lag.measure():
+            requests = sum(unit.stats.sensor_requests for unit in units)
+            start = time.perf_counter()
+            polled = await _drive_polls(hass, args.rounds)
+            wall = time.perf_counter() - start
+            requests = sum(unit.stats.sensor_requests for unit in units) - requests
+        _report(
+            "polls",
+            wall,
+            lag,
+            f"{polled / wall:.0f} polls/s  ({requests} requests seen)",
+        )
+
+        objects = _count_objects() - baseline_objects
+        rss = _rss_mib()
+        print(
+            f"peak RSS {rss:.1f} MiB  "
+            f"(+{(rss - baseline_rss) * 1024 / len(units):.1f} KiB per device)"
+        )
+        print("objects per device:")
+        for name in (*TRACKED_TYPES, "Store"):
+            print(f"  {name:<24} {objects[name] / len(units):6.2f}")
+
+        await hass.async_stop()
+    await asyncio.gather(*(unit.stop() for unit in units))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=200, help="emulated units")
+    parser.add_argument("--rounds", type=int, default=3, help="sends/polls per unit")
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    asyncio.run(_main(parser.parse_args()))
@@ -0,0 +1,164 @@
+"""I/O benchmarks for the RS-WFIREX4 integration against the loopback emulator.
+
+Run from the repository root (Home Assistant must be installed, since the
+connection layer imports it):
+
+    python benchmarks/bench_io.py
+    python benchmarks/bench_io.py --latency 0.005 --jitter 0.005 --fleet 1,10,50,200
+
+Measures send throughput, poll latency percentiles, learn time and the
+per-entry setup I/O (probe race + first sensor frame) as the fleet grows.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from emulator import EmulatorConfig, Wfirex4Emulator, start_fleet  # noqa: E402
+
+from custom_components.rs_wfirex4.codec import (  # noqa: E402
+    LEARN_REQUEST,
+    SENSOR_REQUEST,
+    encode_ir_frame,
+)
+from custom_components.rs_wfirex4.connection import (  # noqa: E402
+    Wfirex4Connection,
+    read_frame,
+    read_sized_frame,
+)
+from custom_components.rs_wfirex4.helpers import _race_connect  # noqa: E402
+
+READ_TIMEOUT = 4.0
+IR_CODE = bytes(300)  # A typical learned AC code.
+
+
+def _percentiles(samples: list[float]) -> str:
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return (
+        f"p50 {cuts[49] * 1000:7.2f} ms  p95 {cuts[94] * 1000:7.2f} ms  "
+        f"p99 {cuts[98] * 1000:7.2f} ms  max {max(samples) * 1000:7.2f} ms"
+    )
+
+
+async def _read_sensor(reader: asyncio.StreamReader) -> bytes:
+    return await read_frame(reader, READ_TIMEOUT)
+
+
+async def bench_poll(unit: Wfirex4Emulator, count: int) -> None:
+    """Poll latency on a held socket and with connect-per-poll."""
+    for label, keep_open in (("held connection", True), ("connect per poll", False)):
+        connection = Wfirex4Connection(unit.host, "00:00:00:00:00:01", unit.port)
+        samples = []
+        for _ in range(count):
+            start = time.perf_counter()
+            await connection.request(SENSOR_REQUEST, _read_sensor, keep_open=keep_open)
+            samples.append(time.perf_counter() - start)
+        await connection.async_close()
+        print(f"  poll, {label:<17} {_percentiles(samples)}")
+
+
+async def bench_send(unit: Wfirex4Emulator, count: int) -> None:
+    """Send throughput: one pipelined batch vs one request per command."""
+    frame = encode_ir_frame(IR_CODE)
+    connection = Wfirex4Connection(unit.host, "00:00:00:00:00:01", unit.port)
+    # Raw I/O throughput: take the send rate limiter out of the way.
+    connection.limiter.configure(0, 1, 0)
+
+    start = time.perf_counter()
+    results = await connection.send_batch([frame] * count)
+    elapsed = time.perf_counter() - start
+    failed = sum(isinstance(result, Exception) for result in results)
+    print(
+        f"  send, pipelined batch    {count / elapsed:9.0f} frames/s"
+        f"  ({failed} failed)"
+    )
+
+    start = time.perf_counter()
+    for _ in range(count):
+        await connection.send_batch([frame])
+    elapsed = time.perf_counter() - start
+    print(f"  send, one per call       {count / elapsed:9.0f} frames/s")
+    await connection.async_close()
+
+
+async def bench_learn(unit: Wfirex4Emulator, count: int) -> None:
+    """Learn round trip beyond the simulated button-press wait."""
+    connection = Wfirex4Connection(unit.host, "00:00:00:00:00:01", unit.port)
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        async with connection.session() as (reader, writer):
+            writer.write(LEARN_REQUEST)
+            await writer.drain()
+            await asyncio.wait_for(read_sized_frame(reader), READ_TIMEOUT)
+        samples.append(time.perf_counter() - start - unit.config.learn_delay)
+    await connection.async_close()
+    print(f"  learn overhead           {_percentiles(samples)}")
+
+
+async def bench_setup(sizes: list[int], config: EmulatorConfig) -> None:
+    """Setup I/O per entry (probe race with the first sensor request)."""
+    for size in sizes:
+        units = await start_fleet(size, 0, config)
+        connections = [
+            Wfirex4Connection(unit.host, f"00:00:00:00:{i // 256:02x}:{i % 256:02x}")
+            for i, unit in enumerate(units)
+        ]
+
+        async def setup_one(unit: Wfirex4Emulator, connection: Wfirex4Connection):
+            start = time.perf_counter()
+            winner = await _race_connect([unit.host], unit.port, 5.0, SENSOR_REQUEST)
+            if winner is None or winner[3] is None:
+                raise RuntimeError(f"{unit.host} did not answer")
+            host, reader, writer, _frame = winner
+            await connection.async_adopt(host, reader, writer)
+            return time.perf_counter() - start
+
+        start = time.perf_counter()
+        samples = await asyncio.gather(
+            *(setup_one(unit, conn) for unit, conn in zip(units, connections))
+        )
+        wall = time.perf_counter() - start
+        print(
+            f"  setup, {size:4d} entries     wall {wall * 1000:8.1f} ms  "
+            f"per entry p50 {statistics.median(samples) * 1000:7.2f} ms  "
+            f"max {max(samples) * 1000:7.2f} ms"
+        )
+        await asyncio.gather(*(conn.async_close() for conn in connections))
+        await asyncio.gather(*(unit.stop() for unit in units))
+
+
+async def _main(args: argparse.Namespace) -> None:
+    config = EmulatorConfig(
+        latency=args.latency, jitter=args.jitter, learn_delay=args.learn_delay
+    )
+    unit = Wfirex4Emulator("127.0.0.1", 0, config)
+    await unit.start()
+    print(
+        f"Emulator: latency {args.latency * 1000:.1f} ms, "
+        f"jitter {args.jitter * 1000:.1f} ms"
+    )
+    await bench_poll(unit, args.count)
+    await bench_send(unit, args.count)
+    await bench_learn(unit, max(args.count // 10, 10))
+    await unit.stop()
+    await bench_setup([int(size) for size in args.fleet.split(",")], config)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=500, help="operations per run")
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--learn-delay", type=float, default=0.05)
+    parser.add_argument("--fleet", default="1,10,50,200", help="fleet sizes")
+    asyncio.run(_main(parser.parse_args()))
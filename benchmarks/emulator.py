@@ -0,0 +1,235 @@
+"""Loopback emulator of the RS-WFIREX4 TCP protocol.
+
+Serves the three exchanges the integration uses:
+
+* sensor request (0x18) -> sensor response with humidity, temperature,
+  illuminance and reliability;
+* IR send (0x11) -> acknowledgement frame;
+* learn request (0x12) -> after a simulated button press, a learn response
+  carrying an IR code.
+
+Responses can be delayed (latency + jitter) or dropped (loss), and the unit
+can refuse connections, either outright (the listener is closed, so the
+client sees ECONNREFUSED) or by resetting a share of accepted connections.
+
+Run one emulated unit from the repository root:
+
+    python benchmarks/emulator.py --host 127.0.0.1 --port 60001
+
+Only the standard library is needed. Many units can share one port on
+distinct loopback addresses (127.0.1.1, 127.0.1.2, ...), as real units
+share port 60001 on distinct IPs.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+
+PACKAGE_DIR = Path(__file__).resolve().parents[1] / "custom_components" / "rs_wfirex4"
+sys.path.insert(0, str(PACKAGE_DIR))
+
+import codec  # noqa: E402
+
+DEFAULT_PORT = 60001
+
+
+@dataclass
+class EmulatorConfig:
+    """Behaviour of one emulated unit."""
+
+    latency: float = 0.0  # Seconds before each response.
+    jitter: float = 0.0  # Extra uniform random delay, 0..jitter seconds.
+    loss: float = 0.0  # Probability that a response is never sent.
+    refuse_rate: float = 0.0  # Probability an accepted connection is reset.
+    learn_delay: float = 0.05  # Simulated wait for the button press.
+    learn_code: bytes = bytes(range(64))
+    humidity: int = 450  # Tenths of a percent.
+    temperature: int = 235  # Tenths of a degree.
+    illuminance: int = 120
+    reliability: int = 255
+
+
+@dataclass
+class EmulatorStats:
+    """What one emulated unit has seen."""
+
+    connections: int = 0
+    refused: int = 0
+    sensor_requests: int = 0
+    ir_frames: int = 0
+    learn_requests: int = 0
+    dropped: int = 0
+    ir_bytes: int = 0
+    last_ir: bytes = b""
+
+
+def sensor_response(config: EmulatorConfig) -> bytes:
+    """Return the sensor response frame the fetcher decodes."""
+    payload = bytes((codec.CMD_SENSOR, 0x00))
+    payload += config.humidity.to_bytes(2, "big")
+    payload += config.temperature.to_bytes(2, "big")
+    payload += config.illuminance.to_bytes(2, "big")
+    payload += bytes((config.reliability,))
+    return codec.encode_frame(payload)
+
+
+def learn_response(code: bytes) -> bytes:
+    """Return a learn response whose code part (frame[8:]) starts with `code`."""
+    payload = bytes((codec.CMD_LEARN, 0x00, 0x00)) + len(code).to_bytes(2, "big")
+    return codec.encode_frame(payload + code)
+
+
+IR_ACK = codec.encode_frame(bytes((codec.CMD_SEND_IR, 0x00)))
+
+
+class Wfirex4Emulator:
+    """One emulated unit listening on host:port."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = DEFAULT_PORT,
+        config: EmulatorConfig | None = None,
+    ) -> None:
+        """Initialize a unit (call start() to listen)."""
+        self.host = host
+        self.port = port
+        self.config = config or EmulatorConfig()
+        self.stats = EmulatorStats()
+        self._server: asyncio.Server | None = None
+        self._writers: set[asyncio.StreamWriter] = set()
+
+    async def start(self) -> None:
+        """Start accepting connections; port 0 picks a free port."""
+        self._server = await asyncio.start_server(
+            self._handle, self.host, self.port, reuse_address=True
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def refuse(self) -> None:
+        """Close the listener and every connection (ECONNREFUSED from now on)."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        for writer in list(self._writers):
+            writer.close()
+
+    async def stop(self) -> None:
+        """Stop the unit."""
+        await self.refuse()
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        self.stats.connections += 1
+        if random.random() < self.config.refuse_rate:
+            self.stats.refused += 1
+            writer.transport.abort()
+            return
+
+        self._writers.add(writer)
+        parser = codec.FrameParser()
+        try:
+            while True:
+                chunk = await reader.read(4096)
+                if not chunk:
+                    break
+                for frame in parser.feed(chunk):
+                    response = await self._respond(codec.frame_payload(frame))
+                    if response is None:
+                        continue
+                    await self._delay()
+                    if random.random() < self.config.loss:
+                        self.stats.dropped += 1
+                        continue
+                    writer.write(response)
+                    await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    async def _respond(self, payload: bytes) -> bytes | None:
+        command = payload[0] if payload else None
+        if command == codec.CMD_SENSOR:
+            self.stats.sensor_requests += 1
+            return sensor_response(self.config)
+        if command == codec.CMD_SEND_IR:
+            self.stats.ir_frames += 1
+            self.stats.last_ir = payload[4:]
+            self.stats.ir_bytes += len(self.stats.last_ir)
+            return IR_ACK
+        if command == codec.CMD_LEARN:
+            self.stats.learn_requests += 1
+            await asyncio.sleep(self.config.learn_delay)
+            return learn_response(self.config.learn_code)
+        return None
+
+    async def _delay(self) -> None:
+        delay = self.config.latency
+        if self.config.jitter:
+            delay += random.uniform(0, self.config.jitter)
+        if delay:
+            await asyncio.sleep(delay)
+
+
+def fleet_address(index: int) -> str:
+    """Return the loopback address of unit `index` in an emulated fleet."""
+    return f"127.0.{1 + index // 250}.{1 + index % 250}"
+
+
+async def start_fleet(
+    count: int, port: int, config: EmulatorConfig | None = None
+) -> list[Wfirex4Emulator]:
+    """Start `count` units on distinct loopback addresses sharing `port`.
+
+    With port 0 the first unit picks a free port and the rest follow it.
+    """
+    first = Wfirex4Emulator(fleet_address(0), port, config)
+    await first.start()
+    units = [first] + [
+        Wfirex4Emulator(fleet_address(i), first.port, config) for i in range(1, count)
+    ]
+    await asyncio.gather(*(unit.start() for unit in units[1:]))
+    return units
+
+
+async def _main(args: argparse.Namespace) -> None:
+    config = EmulatorConfig(
+        latency=args.latency,
+        jitter=args.jitter,
+        loss=args.loss,
+        refuse_rate=args.refuse_rate,
+        learn_delay=args.learn_delay,
+    )
+    units = await start_fleet(args.count, args.port, config) if args.count > 1 else []
+    if not units:
+        unit = Wfirex4Emulator(args.host, args.port, config)
+        await unit.start()
+        units = [unit]
+    for unit in units:
+        print(f"Emulating RS-WFIREX4 on {unit.host}:{unit.port}")
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--count", type=int, default=1, help="units (fleet mode)")
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--loss", type=float, default=0.0)
+    parser.add_argument("--refuse-rate", type=float, default=0.0)
+    parser.add_argument("--learn-delay", type=float, default=0.05)
+    try:
+        asyncio.run(_main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -3,18 +3,36 @@
 from __future__ import annotations
 
 import logging
-from datetime import timedelta
 
 from homeassistant.config_entries import SOURCE_IMPORT, ConfigEntry
-from homeassistant.const import CONF_HOST, CONF_MAC
-from homeassistant.core import HomeAssistant
+from homeassistant.const import CONF_HOST, CONF_MAC, EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.exceptions import ConfigEntryNotReady
 from homeassistant.helpers.device_registry import format_mac
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 
-from .const import DOMAIN
-from .helpers import test_connection
+from .addresses import get_address_book
+from .codec import SENSOR_REQUEST
+from .const import (
+    CONF_ADAPTIVE_POLLING,
+    CONF_MAX_SCAN_INTERVAL,
+    CONF_SEND_BURST,
+    CONF_SEND_QUEUE,
+    CONF_SEND_RATE,
+    CONF_TRACE_THRESHOLD,
+    DEFAULT_ADAPTIVE_POLLING,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    DEFAULT_SEND_BURST,
+    DEFAULT_SEND_QUEUE,
+    DEFAULT_SEND_RATE,
+    DEFAULT_TRACE_THRESHOLD,
+    DOMAIN,
+)
+from .helpers import async_probe, get_connection
+from .poller import get_poll_engine
 from .sensor import Wfirex4Fetcher
+from .services import async_setup_services
+from .tracing import get_tracer
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -23,6 +41,17 @@ PLATFORMS = ["sensor", "remote"]
 
 async def async_setup(hass: HomeAssistant, config: dict):
     """Set up the integration via YAML (import flow)."""
+    async_setup_services(hass)
+    await get_address_book(hass).async_load()
+
+    engine = get_poll_engine(hass)
+
+    @callback
+    def _async_stop_polling(_event) -> None:
+        engine.async_stop()
+
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _async_stop_polling)
+
     if DOMAIN not in config:
         return True
 
@@ -41,29 +70,39 @@ async def async_setup(hass: HomeAssistant, config: dict):
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
     """Set up config entry with connection check BEFORE forwarding platforms."""
 
-    hass.data.setdefault(
-        DOMAIN,
-        {
-            "coordinators": {},
-            "fetchers": {},
-        },
-    )
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    domain_data.setdefault("coordinators", {})
+    domain_data.setdefault("fetchers", {})
+    # Also created on demand by helpers.get_connection (e.g. from config flow).
+    domain_data.setdefault("connections", {})
 
     host = entry.data.get(CONF_HOST, "")
     mac = format_mac(entry.data.get(CONF_MAC, ""))
 
+    trace_threshold = entry.options.get(CONF_TRACE_THRESHOLD, DEFAULT_TRACE_THRESHOLD)
+    get_tracer(hass, mac).threshold = trace_threshold / 1000
+
+    get_connection(hass, host, mac).limiter.configure(
+        entry.options.get(CONF_SEND_RATE, DEFAULT_SEND_RATE),
+        entry.options.get(CONF_SEND_BURST, DEFAULT_SEND_BURST),
+        entry.options.get(CONF_SEND_QUEUE, DEFAULT_SEND_QUEUE),
+    )
+
     # -----------------------
     # 1. Check connection
     # -----------------------
+    # The probe also asks for the first sensor reading, so one round trip
+    # both finds the device and primes the coordinator.
     try:
-        reachable_host = await test_connection(hass, host, mac)
+        probe = await async_probe(hass, host, mac, SENSOR_REQUEST)
     except Exception as err:
         _LOGGER.exception("Unexpected error during pre-setup connection test")
         raise ConfigEntryNotReady from err
 
-    if not reachable_host:
+    if not probe:
         # Home Assistant は自動リトライするので OK
         raise ConfigEntryNotReady("Device not reachable during setup")
+    reachable_host, first_frame = probe
 
     # -----------------------
     # 2. Save if IP changed
@@ -88,6 +127,8 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
         scan_interval = opts.get("scan_interval", 60)
         temp_offset = opts.get("temp_offset", entry.data.get("temp_offset", 0.0))
         humi_offset = opts.get("humi_offset", entry.data.get("humi_offset", 0.0))
+        adaptive = opts.get(CONF_ADAPTIVE_POLLING, DEFAULT_ADAPTIVE_POLLING)
+        max_scan_interval = opts.get(CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL)
 
         fetcher = hass.data[DOMAIN]["fetchers"].get(mac)
         if not fetcher:
@@ -99,6 +140,8 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
                 scan_interval,
                 entry,
                 hass,
+                adaptive=adaptive,
+                max_scan_interval=max_scan_interval,
             )
         else:
             # Update existing fetcher with latest config
@@ -109,8 +152,12 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
                 scan_interval=scan_interval,
                 entry=entry,
                 hass=hass,
+                adaptive=adaptive,
+                max_scan_interval=max_scan_interval,
             )
 
+        # No update_interval: the domain-wide poll engine refreshes the
+        # coordinator on a staggered schedule instead.
         coordinator = hass.data[DOMAIN]["coordinators"].get(mac)
         if not coordinator:
             coordinator = hass.data[DOMAIN]["coordinators"][mac] = (
@@ -118,19 +165,29 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
                     hass,
                     _LOGGER,
                     name=entry.title or mac,
-                    update_interval=timedelta(seconds=scan_interval),
                     update_method=fetcher.get_sensor_data,
                 )
             )
-        else:
-            coordinator.update_interval = timedelta(seconds=scan_interval)
 
-        # IMPORTANT: If first refresh fails, raise ConfigEntryNotReady HERE
-        # (before async_forward_entry_setups), otherwise HA will warn.
         try:
-            await coordinator.async_config_entry_first_refresh()
-        except Exception as err:
-            raise ConfigEntryNotReady from err
+            seeded = fetcher.seed(first_frame, host) if first_frame else None
+        except ValueError as err:
+            _LOGGER.debug("Ignoring malformed probe response: %s", err)
+            seeded = None
+
+        if seeded is not None:
+            coordinator.async_set_updated_data(seeded)
+        else:
+            # IMPORTANT: If first refresh fails, raise ConfigEntryNotReady HERE
+            # (before async_forward_entry_setups), otherwise HA will warn.
+            try:
+                await coordinator.async_config_entry_first_refresh()
+            except Exception as err:
+                raise ConfigEntryNotReady from err
+
+        get_poll_engine(hass).async_add(
+            mac, coordinator, scan_interval, fetcher.next_interval
+        )
 
     # -----------------------
     # 4. Forward platforms
@@ -144,4 +201,12 @@ async def async_unload_entry(hass: HomeAssistant, entry):
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     if unload_ok:
         hass.data[DOMAIN].pop(entry.entry_id, None)
+
+        mac = format_mac(entry.data.get(CONF_MAC, ""))
+        get_poll_engine(hass).async_remove(mac)
+
+        # Drop the warm socket; the connection object itself is reused on reload.
+        connection = hass.data[DOMAIN]["connections"].get(mac)
+        if connection is not None:
+            await connection.async_close()
     return unload_ok
@@ -0,0 +1,127 @@
+"""MAC-to-IP index for RS-WFIREX4 units, kept current from the device registry."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.storage import Store
+
+from .helpers import get_domain_object, load_once
+
+_LOGGER = logging.getLogger(__name__)
+
+ADDRESS_STORAGE_VERSION = 1
+ADDRESS_STORAGE_KEY = "rs_wfirex4_addresses"
+ADDRESS_SAVE_DELAY = 10
+
+
+def get_address_book(hass: HomeAssistant) -> Wfirex4AddressBook:
+    """Return the shared address book."""
+    return get_domain_object(hass, "addresses", Wfirex4AddressBook, hass)
+
+
+class Wfirex4AddressBook:
+    """Answer "which IP has this MAC" without scanning the device registry.
+
+    The registry is indexed once and then kept current from its update
+    events. The last IP each unit was reached at is persisted, so it is
+    known right after a restart, before any registry entry mentions it.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize an empty book (nothing is read until async_load)."""
+        self.hass = hass
+        self._store = Store(hass, ADDRESS_STORAGE_VERSION, ADDRESS_STORAGE_KEY)
+        self._registry: dict[str, str] = {}  # mac -> first registry IP
+        self._owners: dict[str, str] = {}  # mac -> device_id of that IP
+        self._device_macs: dict[str, tuple[str, ...]] = {}  # device_id -> macs
+        self._last_known: dict[str, str] = {}
+        self._load_task: asyncio.Task | None = None
+
+    def lookup(self, mac: str) -> str | None:
+        """Return the registry IP of `mac`, else the last IP it was reached at."""
+        mac = mac.lower()
+        return self._registry.get(mac) or self._last_known.get(mac)
+
+    def last_known(self, mac: str) -> str | None:
+        """Return the last IP `mac` was reached at, if any."""
+        return self._last_known.get(mac.lower())
+
+    def registry_ip(self, mac: str) -> str | None:
+        """Return the IP the device registry holds for `mac`, if any."""
+        return self._registry.get(mac.lower())
+
+    @callback
+    def async_remember(self, mac: str, host: str) -> None:
+        """Record that `mac` answered at `host`; saved with a short delay."""
+        mac = mac.lower()
+        if not host or self._last_known.get(mac) == host:
+            return
+        self._last_known[mac] = host
+        self._store.async_delay_save(self._data_to_save, ADDRESS_SAVE_DELAY)
+
+    def _data_to_save(self) -> dict:
+        return {"last_known": self._last_known}
+
+    @load_once
+    async def async_load(self) -> None:
+        """Load the book and start following the device registry."""
+        data = await self._store.async_load()
+        if data:
+            # Keep anything remembered before the load finished.
+            self._last_known = {**data.get("last_known", {}), **self._last_known}
+
+        registry = dr.async_get(self.hass)
+        for device in registry.devices.values():
+            self._index_device(device)
+        # The book lives as long as hass, so the listener is never removed.
+        self.hass.bus.async_listen(
+            dr.EVENT_DEVICE_REGISTRY_UPDATED, self._async_registry_updated
+        )
+        _LOGGER.debug(
+            "Indexed %d MAC address(es), %d last known",
+            len(self._registry),
+            len(self._last_known),
+        )
+
+    @callback
+    def _async_registry_updated(self, event: Event) -> None:
+        device_id = event.data["device_id"]
+        self._unindex_device(device_id)
+        if event.data["action"] == "remove":
+            return
+        device = dr.async_get(self.hass).async_get(device_id)
+        if device is not None:
+            self._index_device(device)
+
+    def _index_device(self, device) -> None:
+        ip_addresses = getattr(device, "ip_addresses", None)
+        if not ip_addresses:
+            return
+        macs = tuple(value.lower() for _type, value in device.connections)
+        self._device_macs[device.id] = macs
+        for mac in macs:
+            # First device wins, as with the registry scan this replaces.
+            if self._owners.setdefault(mac, device.id) == device.id:
+                self._registry[mac] = ip_addresses[0]
+
+    def _unindex_device(self, device_id: str) -> None:
+        freed = set()
+        for mac in self._device_macs.pop(device_id, ()):
+            # Leave MACs another device indexed first alone.
+            if self._owners.get(mac) == device_id:
+                del self._owners[mac]
+                self._registry.pop(mac, None)
+                freed.add(mac)
+        if not freed:
+            return
+        # Hand a freed MAC to the next device that lists it.
+        registry = dr.async_get(self.hass)
+        for other_id, macs in list(self._device_macs.items()):
+            if freed.intersection(macs):
+                device = registry.async_get(other_id)
+                if device is not None:
+                    self._index_device(device)
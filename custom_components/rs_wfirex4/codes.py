@@ -0,0 +1,375 @@
+"""Domain-wide IR code library shared by every RS-WFIREX4 remote."""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import zlib
+from base64 import b64decode, b64encode
+from collections.abc import Mapping
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.storage import Store
+
+from .codec import encode_ir_frame
+from .const import DOMAIN
+from .helpers import get_domain_object, load_once
+
+_LOGGER = logging.getLogger(__name__)
+
+CODE_STORAGE_VERSION = 3
+CODE_STORAGE_KEY = "rs_wfirex4_codes"
+ZLIB_PREFIX = "z:"  # Marks a zlib-compressed blob in the stored base64 text.
+JOURNAL_COMPACT_SIZE = 64 * 1024  # Fold the journal into the snapshot past this.
+
+
+def pack_code(code: bytes | list[bytes]) -> str | list[str]:
+    """Return the stored text form of a code (or toggle list).
+
+    Codes are base64; zlib is used only when it actually makes them smaller.
+    """
+    if isinstance(code, list):
+        return [pack_code(value) for value in code]
+    compressed = zlib.compress(code, 9)
+    if len(compressed) < len(code):
+        return ZLIB_PREFIX + b64encode(compressed).decode()
+    return b64encode(code).decode()
+
+
+def unpack_code(text: str | list[str]) -> bytes | list[bytes]:
+    """Return the raw bytes of a stored code (or toggle list)."""
+    if isinstance(text, list):
+        return [unpack_code(value) for value in text]
+    if text.startswith(ZLIB_PREFIX):
+        return zlib.decompress(b64decode(text[len(ZLIB_PREFIX) :]))
+    return b64decode(text)
+
+
+def code_digest(code: bytes) -> str:
+    """Return the content address of a code."""
+    return hashlib.blake2b(code, digest_size=10).hexdigest()
+
+
+def serialize_codes(codes: Mapping[str, Mapping[str, bytes | list[bytes]]]) -> dict:
+    """Return the stored (version 3) form of a code library.
+
+    Each distinct waveform is packed once under "blobs"; "codes" maps every
+    (device, command) to the digest, or a list of two for toggle commands.
+    """
+    blobs: dict[str, str] = {}
+    stored: dict[str, dict[str, str | list[str]]] = {}
+    for device, commands in codes.items():
+        stored_commands = stored[device] = {}
+        for command, code in commands.items():
+            digests = []
+            for value in code if isinstance(code, list) else [code]:
+                digest = code_digest(value)
+                if digest not in blobs:
+                    blobs[digest] = pack_code(value)
+                digests.append(digest)
+            stored_commands[command] = digests if isinstance(code, list) else digests[0]
+    return {"blobs": blobs, "codes": stored}
+
+
+class _CodeStore(Store):
+    """Code store that migrates older layouts to deduplicated blobs.
+
+    Version 1 held hex strings, version 2 packed codes inline.
+    """
+
+    migrated = False
+
+    async def _async_migrate_func(self, old_major_version, old_minor_version, old_data):
+        if old_major_version >= CODE_STORAGE_VERSION:
+            return old_data
+
+        self.migrated = True
+        decode = bytes.fromhex if old_major_version == 1 else unpack_code
+        codes: dict[str, dict[str, bytes | list[bytes]]] = {}
+        for device, commands in old_data.items():
+            for command, code in commands.items():
+                try:
+                    codes.setdefault(device, {})[command] = (
+                        [decode(value) for value in code]
+                        if isinstance(code, list)
+                        else decode(code)
+                    )
+                except (ValueError, zlib.error):
+                    _LOGGER.warning(
+                        "Dropping invalid stored code for '%s' (%s)",
+                        command,
+                        device,
+                    )
+        return serialize_codes(codes)
+
+
+def get_code_repository(hass: HomeAssistant) -> Wfirex4CodeRepository:
+    """Return the shared code repository."""
+    return get_domain_object(hass, "codes", Wfirex4CodeRepository, hass)
+
+
+class Wfirex4CodeRepository:
+    """Load the code library once and share it among all remotes.
+
+    The published mapping is never mutated: a change builds a new outer dict
+    (and a new dict for the touched device) and swaps it in, so any snapshot
+    a reader holds stays consistent. Writes are serialized by a single lock.
+    Codes are held as bytes (a list of two for toggle commands).
+
+    Identical waveforms are interned by digest: every (device, command)
+    carrying the same code references one bytes object and one precompiled
+    frame, and the stored library holds each waveform once.
+
+    Changes are appended to a small JSON-lines journal next to the store
+    instead of rewriting the whole library. Once the journal grows past
+    JOURNAL_COMPACT_SIZE it is folded into the snapshot in the background.
+    Loading replays the journal on top of the snapshot; replaying is
+    idempotent, so a crash between saving and truncating loses nothing.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize an empty, not yet loaded repository."""
+        self.hass = hass
+        self._store: Store[Any] = _CodeStore(
+            hass, CODE_STORAGE_VERSION, CODE_STORAGE_KEY
+        )
+        self._journal_path = hass.config.path(
+            ".storage", f"{CODE_STORAGE_KEY}.journal"
+        )
+        self._journal_size = 0
+        self._compact_task: asyncio.Task | None = None
+        self._codes: dict[str, dict[str, bytes | list[bytes]]] = {}
+        # Encoded frames keyed by (device, command, toggle_state); the values
+        # are shared from _frame_pool.
+        self._frames: dict[tuple[str, str, int], bytes] = {}
+        self._blobs: dict[str, bytes] = {}
+        self._frame_pool: dict[str, bytes] = {}
+        self._load_task: asyncio.Task | None = None
+        self._load_failed = False
+        self._write_lock = asyncio.Lock()
+
+    def snapshot(self) -> Mapping[str, Mapping[str, bytes | list[bytes]]]:
+        """Return the current code library; it is never modified in place."""
+        return self._codes
+
+    def get_code(self, device: str, command: str) -> bytes | list[bytes]:
+        """Return the stored code (or toggle list) for a command."""
+        return self._codes[device][command]
+
+    def get_frame(self, device: str, command: str, toggle: int = 0) -> bytes:
+        """Return the encoded frame for a stored code."""
+        return self._frames[(device, command, toggle)]
+
+    def dedup_stats(self) -> dict:
+        """Return how much the interning saves across the library."""
+        references = 0
+        referenced_bytes = 0
+        unique: dict[int, int] = {}
+        for commands in self._codes.values():
+            for code in commands.values():
+                for value in code if isinstance(code, list) else [code]:
+                    references += 1
+                    referenced_bytes += len(value)
+                    unique[id(value)] = len(value)
+        unique_bytes = sum(unique.values())
+        return {
+            "codes": references,
+            "unique_codes": len(unique),
+            "code_bytes": referenced_bytes,
+            "unique_code_bytes": unique_bytes,
+            "saved_bytes": referenced_bytes - unique_bytes,
+        }
+
+    async def async_set(
+        self, device: str, command: str, code: bytes | list[bytes]
+    ) -> None:
+        """Publish a new or changed code and journal it."""
+        code = self._compile(device, command, code)
+        codes = dict(self._codes)
+        codes[device] = {**codes.get(device, {}), command: code}
+        self._codes = codes
+        await self._async_journal(
+            {
+                "op": "set",
+                "device": device,
+                "command": command,
+                "blob": pack_code(code),
+            }
+        )
+
+    async def async_delete(self, device: str, command: str) -> None:
+        """Remove a code and journal the removal. Raises KeyError if unknown."""
+        commands = dict(self._codes[device])
+        del commands[command]
+        codes = dict(self._codes)
+        if commands:
+            codes[device] = commands
+        else:
+            del codes[device]
+        self._codes = codes
+        for key in [key for key in self._frames if key[:2] == (device, command)]:
+            del self._frames[key]
+        await self._async_journal(
+            {"op": "delete", "device": device, "command": command}
+        )
+
+    async def async_compact(self) -> None:
+        """Write the full library as the new snapshot and empty the journal."""
+        if self._load_failed:
+            # Saving now would replace the stored library with a partial one.
+            _LOGGER.error("Not saving IR codes: the stored library failed to load")
+            return
+        async with self._write_lock:
+            # The published mapping is immutable, so it can be packed off-loop.
+            stored = await self.hass.async_add_executor_job(
+                serialize_codes, self._codes
+            )
+            await self._store.async_save(stored)
+            await self.hass.async_add_executor_job(self._truncate_journal)
+            self._journal_size = 0
+            self._prune()
+
+    async def _async_journal(self, record: dict) -> None:
+        if self._load_failed:
+            _LOGGER.error("Not saving IR codes: the stored library failed to load")
+            return
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        async with self._write_lock:
+            await self.hass.async_add_executor_job(self._append_journal, line)
+            self._journal_size += len(line)
+
+        if self._journal_size >= JOURNAL_COMPACT_SIZE and (
+            self._compact_task is None or self._compact_task.done()
+        ):
+            self._compact_task = self.hass.async_create_background_task(
+                self.async_compact(), f"{DOMAIN} code journal compaction"
+            )
+
+    def _append_journal(self, line: str) -> None:
+        with open(self._journal_path, "a", encoding="utf-8") as journal:
+            journal.write(line)
+            journal.flush()
+            os.fsync(journal.fileno())
+
+    def _truncate_journal(self) -> None:
+        with open(self._journal_path, "w", encoding="utf-8"):
+            pass
+
+    def _read_journal(self) -> tuple[list[dict], int]:
+        try:
+            with open(self._journal_path, encoding="utf-8") as journal:
+                text = journal.read()
+        except FileNotFoundError:
+            return [], 0
+
+        records = []
+        for line in text.splitlines():
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                # A torn last line after a crash; everything before it is intact.
+                _LOGGER.warning("Skipping unreadable IR code journal record")
+        return records, len(text.encode())
+
+    @load_once
+    async def async_load(self) -> None:
+        """Load the library and replay its journal."""
+        try:
+            stored = await self._store.async_load() or {}
+        except HomeAssistantError:
+            self._load_failed = True
+            raise
+
+        blobs: dict[str, bytes] = {}
+        for digest, text in stored.get("blobs", {}).items():
+            try:
+                blobs[digest] = unpack_code(text)
+            except (ValueError, zlib.error):
+                _LOGGER.warning("Invalid stored IR code blob %s", digest)
+
+        codes: dict[str, dict[str, bytes | list[bytes]]] = {}
+        for device, commands in stored.get("codes", {}).items():
+            for command, ref in commands.items():
+                try:
+                    codes.setdefault(device, {})[command] = (
+                        [blobs[digest] for digest in ref]
+                        if isinstance(ref, list)
+                        else blobs[ref]
+                    )
+                except KeyError:
+                    _LOGGER.warning(
+                        "Invalid stored code for '%s' (%s)", command, device
+                    )
+
+        records, self._journal_size = await self.hass.async_add_executor_job(
+            self._read_journal
+        )
+        for record in records:
+            device, command = record.get("device"), record.get("command")
+            try:
+                if record.get("op") == "set":
+                    code = unpack_code(record["blob"])
+                    codes.setdefault(device, {})[command] = code
+                elif record.get("op") == "delete":
+                    codes.get(device, {}).pop(command, None)
+                    if device in codes and not codes[device]:
+                        del codes[device]
+            except (KeyError, ValueError, zlib.error):
+                _LOGGER.warning("Skipping invalid IR code journal record")
+
+        self._frames.clear()
+        self._blobs.clear()
+        self._frame_pool.clear()
+        for device, commands in codes.items():
+            for command, code in commands.items():
+                commands[command] = self._compile(device, command, code)
+        self._codes = codes
+
+        stats = self.dedup_stats()
+        _LOGGER.debug(
+            "Loaded %d IR codes (%d unique, %d bytes deduplicated)",
+            stats["codes"],
+            stats["unique_codes"],
+            stats["saved_bytes"],
+        )
+
+        if self._store.migrated:
+            # Persist the packed form now rather than at the next compaction.
+            self.hass.async_create_background_task(
+                self.async_compact(), f"{DOMAIN} code storage migration"
+            )
+
+    def _compile(
+        self, device: str, command: str, code: bytes | list[bytes]
+    ) -> bytes | list[bytes]:
+        """Intern a code, map its frames (both toggle halves) and return it.
+
+        The returned value references the interned bytes objects.
+        """
+        interned = []
+        for toggle, value in enumerate(code if isinstance(code, list) else [code]):
+            digest = code_digest(value)
+            blob = self._blobs.get(digest)
+            if blob is None:
+                blob = self._blobs[digest] = value
+                self._frame_pool[digest] = encode_ir_frame(value)
+            self._frames[(device, command, toggle)] = self._frame_pool[digest]
+            interned.append(blob)
+        return interned if isinstance(code, list) else interned[0]
+
+    def _prune(self) -> None:
+        """Drop interned waveforms no code references any more."""
+        live = {
+            code_digest(value)
+            for commands in self._codes.values()
+            for code in commands.values()
+            for value in (code if isinstance(code, list) else [code])
+        }
+        for digest in [digest for digest in self._blobs if digest not in live]:
+            del self._blobs[digest]
+            del self._frame_pool[digest]
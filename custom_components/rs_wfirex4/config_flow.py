@@ -12,14 +12,29 @@ from homeassistant.core import callback
 from homeassistant.helpers.device_registry import format_mac
 
 from .const import (
+    CONF_ADAPTIVE_POLLING,
     CONF_HUMI_OFFSET,
+    CONF_MAX_SCAN_INTERVAL,
+    CONF_SEND_BURST,
+    CONF_SEND_QUEUE,
+    CONF_SEND_RATE,
     CONF_TEMP_OFFSET,
+    CONF_TRACE_THRESHOLD,
+    DEFAULT_ADAPTIVE_POLLING,
     DEFAULT_HUMI_OFFSET,
+    DEFAULT_MAX_SCAN_INTERVAL,
     DEFAULT_SCAN_INTERVAL,
+    DEFAULT_SEND_BURST,
+    DEFAULT_SEND_QUEUE,
+    DEFAULT_SEND_RATE,
     DEFAULT_TEMP_OFFSET,
+    DEFAULT_TRACE_THRESHOLD,
     DOMAIN,
 )
-from .helpers import build_default_name_with_mac, test_connection
+from .helpers import (
+    build_default_name_with_mac,
+    test_connection,
+)
 
 
 class WFireX4ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
@@ -49,7 +64,9 @@ class WFireX4ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                     CONF_NAME,
                     default=discovery.get(CONF_NAME, build_default_name_with_mac(mac)),
                 ): str,
-                vol.Optional(CONF_SCAN_INTERVAL, default=DEFAULT_SCAN_INTERVAL): int,
+                vol.Optional(
+                    CONF_SCAN_INTERVAL, default=DEFAULT_SCAN_INTERVAL
+                ): vol.All(vol.Coerce(int), vol.Range(min=1)),
                 vol.Optional(CONF_TEMP_OFFSET, default=DEFAULT_TEMP_OFFSET): vol.Coerce(
                     float
                 ),
@@ -86,7 +103,8 @@ class WFireX4ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
         # Optional: avoid false positives by testing connection
         try:
-            await test_connection(self.hass, host, mac)
+            # No entry owns this unit yet, so keep its socket out of the pool.
+            await test_connection(self.hass, host, mac, adopt=False)
         except Exception:
             # Do not start config flow if device is unreachable
             return self.async_abort(reason="cannot_connect")
@@ -109,7 +127,7 @@ class WFireX4ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
 
 class WFireX4OptionsFlow(config_entries.OptionsFlow):
-    """Options flow to edit scan_interval and offsets."""
+    """Options flow to edit polling, offsets, tracing and send limits."""
 
     async def async_step_init(self, user_input=None):
         if user_input is not None:
@@ -128,12 +146,36 @@ class WFireX4OptionsFlow(config_entries.OptionsFlow):
         humi_offset = options.get(
             CONF_HUMI_OFFSET, data.get(CONF_HUMI_OFFSET, DEFAULT_HUMI_OFFSET)
         )
+        adaptive = options.get(CONF_ADAPTIVE_POLLING, DEFAULT_ADAPTIVE_POLLING)
+        max_scan_interval = options.get(
+            CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL
+        )
+        trace_threshold = options.get(CONF_TRACE_THRESHOLD, DEFAULT_TRACE_THRESHOLD)
+        send_rate = options.get(CONF_SEND_RATE, DEFAULT_SEND_RATE)
+        send_burst = options.get(CONF_SEND_BURST, DEFAULT_SEND_BURST)
+        send_queue = options.get(CONF_SEND_QUEUE, DEFAULT_SEND_QUEUE)
 
         schema = vol.Schema(
             {
-                vol.Optional(CONF_SCAN_INTERVAL, default=scan_interval): int,
+                vol.Optional(CONF_SCAN_INTERVAL, default=scan_interval): vol.All(
+                    vol.Coerce(int), vol.Range(min=1)
+                ),
                 vol.Optional(CONF_TEMP_OFFSET, default=temp_offset): vol.Coerce(float),
                 vol.Optional(CONF_HUMI_OFFSET, default=humi_offset): vol.Coerce(float),
+                vol.Optional(CONF_ADAPTIVE_POLLING, default=adaptive): bool,
+                vol.Optional(CONF_MAX_SCAN_INTERVAL, default=max_scan_interval): int,
+                vol.Optional(CONF_TRACE_THRESHOLD, default=trace_threshold): vol.All(
+                    vol.Coerce(int), vol.Range(min=0)
+                ),
+                vol.Optional(CONF_SEND_RATE, default=send_rate): vol.All(
+                    vol.Coerce(float), vol.Range(min=0)
+                ),
+                vol.Optional(CONF_SEND_BURST, default=send_burst): vol.All(
+                    vol.Coerce(int), vol.Range(min=1)
+                ),
+                vol.Optional(CONF_SEND_QUEUE, default=send_queue): vol.All(
+                    vol.Coerce(int), vol.Range(min=0)
+                ),
             }
         )
 
@@ -0,0 +1,558 @@
+"""Persistent per-device TCP connections to RS-WFIREX4 units."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import socket
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable, Sequence
+from contextlib import AbstractAsyncContextManager, asynccontextmanager, nullcontext
+
+from .codec import (
+    FRAME_START,
+    HEADER_LEN,
+    MAX_FRAME_LEN,
+    FrameParser,
+    crc8,
+    frame_length,
+)
+from .const import PORT
+from .limiter import Wfirex4SendLimiter
+from .metrics import Wfirex4Metrics
+from .scheduler import (
+    PRIORITY_LEARN,
+    PRIORITY_NAMES,
+    PRIORITY_POLL,
+    PRIORITY_SEND,
+    Wfirex4Scheduler,
+)
+from .tracing import add_phase
+
+_LOGGER = logging.getLogger(__name__)
+
+CONNECT_TIMEOUT = 4.0  # Intentionally short; on a LAN, ~3-6s is usually sufficient.
+KEEPALIVE_IDLE = 30  # Seconds idle before the kernel probes a held socket.
+KEEPALIVE_INTERVAL = 10
+KEEPALIVE_COUNT = 3
+
+ReadFunc = Callable[[asyncio.StreamReader], Awaitable[bytes]]
+
+# Metric phase -> name of the same phase in slow-operation traces.
+TRACE_PHASES = {"connect": "connect", "write": "drain", "first_byte": "read"}
+
+
+async def read_frame(reader: asyncio.StreamReader, timeout: float) -> bytes:
+    """Read until one complete, CRC-valid frame arrives; b"" if the peer closes."""
+    parser = FrameParser()
+    while True:
+        chunk = await asyncio.wait_for(reader.read(1024), timeout=timeout)
+        if not chunk:
+            return b""
+        frames = parser.feed(chunk)
+        if frames:
+            return frames[0]
+
+
+async def read_sized_frame(reader: asyncio.StreamReader) -> bytes:
+    """Read exactly one frame, sized by its header, into a preallocated buffer.
+
+    Bytes before the start marker are discarded, as is a start marker whose
+    header announces a frame longer than MAX_FRAME_LEN. Raises IncompleteReadError
+    if the peer closes mid-frame and ValueError if the CRC does not match.
+    """
+    marker = bytes((FRAME_START,))
+    await reader.readuntil(marker)
+    header = marker + await reader.readexactly(HEADER_LEN - 1)
+    while frame_length(header) > MAX_FRAME_LEN:
+        # Corrupt header: resynchronize on the next start marker, which may
+        # be one of the length bytes already read.
+        next_start = header.find(marker, 1)
+        if next_start < 0:
+            await reader.readuntil(marker)
+            header = marker
+        else:
+            header = header[next_start:]
+        header += await reader.readexactly(HEADER_LEN - len(header))
+    size = frame_length(header)
+
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    view[:HEADER_LEN] = header
+    pos = HEADER_LEN
+    while pos < size:
+        chunk = await reader.read(size - pos)
+        if not chunk:
+            raise asyncio.IncompleteReadError(bytes(view[:pos]), size)
+        view[pos : pos + len(chunk)] = chunk
+        pos += len(chunk)
+
+    if crc8(view[HEADER_LEN:-1]) != buffer[-1]:
+        raise ValueError("CRC mismatch in received frame")
+    return bytes(buffer)
+
+
+async def _sleep_until(deadline: float) -> None:
+    """Sleep until time.monotonic() reaches `deadline`, tracing the wait."""
+    wait = deadline - time.monotonic()
+    if wait > 0:
+        await asyncio.sleep(wait)
+        add_phase("throttle", wait)
+
+
+class Wfirex4Connection:
+    """Keep a warm TCP connection to one RS-WFIREX4 and reopen it on demand.
+
+    The device answers several request frames on one socket, but it may drop
+    the connection when idle. A stale socket is detected on first use and
+    replaced transparently, so callers never pay more than one extra connect.
+
+    All I/O is granted through the device's scheduler, so sends, learning
+    sessions and polls never interleave on the wire.
+    """
+
+    __slots__ = (
+        "_host",
+        "mac",
+        "port",
+        "_reader",
+        "_writer",
+        "scheduler",
+        "limiter",
+        "metrics",
+    )
+
+    def __init__(self, host: str, mac: str, port: int = PORT) -> None:
+        """Initialize the connection holder (no I/O is done here)."""
+        self._host = host
+        self.mac = mac
+        self.port = port
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        self.scheduler = Wfirex4Scheduler()
+        self.limiter = Wfirex4SendLimiter()
+        self.metrics = Wfirex4Metrics()
+
+    @property
+    def host(self) -> str:
+        """Return the host the connection is (or will be) opened to."""
+        return self._host
+
+    @property
+    def connected(self) -> bool:
+        """Return True while the socket looks usable."""
+        return (
+            self._writer is not None
+            and self._reader is not None
+            and not self._writer.is_closing()
+            and not self._reader.at_eof()
+        )
+
+    def set_host(self, host: str) -> None:
+        """Point the connection at a new host; the old socket is dropped.
+
+        Call it only while holding a scheduler slot, since the socket may be
+        in use by another exchange otherwise; see async_set_host().
+        """
+        if host and host != self._host:
+            self._host = host
+            self._abort()
+
+    async def async_set_host(self, host: str) -> None:
+        """Point the connection at a new host once no exchange is using it."""
+        async with self.scheduler.slot(PRIORITY_POLL):
+            self.set_host(host)
+
+    async def async_adopt(
+        self,
+        host: str,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        """Take over a socket opened elsewhere (e.g. by a connection probe)."""
+        async with self.scheduler.slot(PRIORITY_POLL):
+            self._host = host
+            await self.async_close()
+            self._reader, self._writer = reader, writer
+            _enable_keepalive(writer.get_extra_info("socket"))
+            _LOGGER.debug("Adopted WFIREX4 connection to %s:%s", host, self.port)
+
+    async def async_close(self) -> None:
+        """Close the held socket, if any."""
+        writer = self._writer
+        self._reader = self._writer = None
+        if writer is None:
+            return
+        try:
+            writer.close()
+            await writer.wait_closed()
+        except Exception as err:
+            _LOGGER.debug(
+                "Error closing WFIREX4 connection to %s:%s: %s",
+                self._host,
+                self.port,
+                err,
+            )
+
+    async def request(
+        self,
+        frame: bytes,
+        read: ReadFunc,
+        priority: int = PRIORITY_POLL,
+        *,
+        keep_open: bool = True,
+        idempotent: bool = False,
+        host: str | None = None,
+        gate: AbstractAsyncContextManager | None = None,
+    ) -> bytes:
+        """Send one request frame and return what `read` collects.
+
+        If a reused socket turns out to be closed by the device, the request
+        is replayed once on a fresh connection. An `idempotent` request is
+        also replayed when a reused socket misses the read deadline, which is
+        how a half-open connection shows up. With `keep_open=False` the
+        exchange uses a short-lived socket of its own and the held one is
+        left alone, still warm for other callers (connect-per-request). A `host`
+        switches the connection to it once the slot is granted, and a `gate`
+        is held around the exchange itself, never while queued for the slot.
+        """
+        operation = PRIORITY_NAMES[priority]
+        async with self._measure(operation) as outcome:
+            async with self._slot(priority), gate or nullcontext():
+                if host:
+                    self.set_host(host)
+                if keep_open:
+                    data = await self._async_request(
+                        frame, read, operation, idempotent
+                    )
+                else:
+                    data = await self._async_request_once(frame, read, operation)
+            outcome["ok"] = bool(data)
+            return data
+
+    async def _async_request(
+        self,
+        frame: bytes,
+        read: ReadFunc,
+        operation: str,
+        idempotent: bool,
+    ) -> bytes:
+        while True:
+            reused = self.connected
+            await self._async_open(operation=operation)
+            try:
+                began = time.monotonic()
+                self._writer.write(frame)
+                await self._writer.drain()
+                written = time.monotonic()
+                data = await read(self._reader)
+            except asyncio.TimeoutError:
+                # A non-idempotent frame may have been acted on; never
+                # replay it.
+                await self.async_close()
+                if reused and idempotent:
+                    _LOGGER.debug(
+                        "No response on held connection to %s; reconnecting",
+                        self._host,
+                    )
+                    self.metrics.record_retry(operation)
+                    continue
+                raise
+            except (OSError, asyncio.IncompleteReadError):
+                await self.async_close()
+                if reused:
+                    self.metrics.record_retry(operation)
+                    continue
+                raise
+            except BaseException:
+                await self.async_close()
+                raise
+
+            if not data:
+                await self.async_close()
+                if reused:
+                    self.metrics.record_retry(operation)
+                    continue
+            else:
+                self._record(operation, "write", written - began)
+                self._record(operation, "first_byte", time.monotonic() - written)
+            return data
+
+    async def _async_request_once(
+        self, frame: bytes, read: ReadFunc, operation: str
+    ) -> bytes:
+        """Exchange one frame on a private socket that is closed afterwards."""
+        start = time.monotonic()
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(self._host, self.port), timeout=CONNECT_TIMEOUT
+        )
+        began = time.monotonic()
+        self._record(operation, "connect", began - start)
+        try:
+            writer.write(frame)
+            await writer.drain()
+            written = time.monotonic()
+            data = await read(reader)
+        finally:
+            writer.close()
+        if data:
+            self._record(operation, "write", written - began)
+            self._record(operation, "first_byte", time.monotonic() - written)
+        return data
+
+    async def send_batch(
+        self,
+        frames: Sequence[bytes],
+        delay: float = 0,
+        ack_timeout: float = CONNECT_TIMEOUT,
+        priority: int = PRIORITY_SEND,
+    ) -> list[bytes | Exception]:
+        """Stream frames over one session and return a result per frame.
+
+        Frames are written `delay` seconds apart without waiting for the
+        previous acknowledgement; acknowledgements are matched in order as
+        they arrive. A result is the acknowledgement frame or the exception
+        that kept the frame from being confirmed. If the device drops the
+        connection, frames not yet written continue on a new one; frames
+        already written are never replayed, since the device may have acted on
+        them, and are reported unconfirmed instead.
+
+        Frames are also paced by the device's send limiter; if its queue is
+        full, SendRateLimited is raised and nothing is sent.
+        """
+        operation = PRIORITY_NAMES[priority]
+        results: list[bytes | Exception | None] = [None] * len(frames)
+        if not frames:
+            return []
+        ready_at = self.limiter.reserve(len(frames), delay)
+        # Frames handed to the socket so far; kept current by _async_stream
+        # so a cancelled send still knows which reservations went unused.
+        progress = {"written": 0}
+        index = 0
+        try:
+            async with self._measure(operation) as outcome:
+                # Wait for the first token before queuing for the device, so
+                # throttled sends do not hold up polls.
+                await _sleep_until(ready_at[0])
+                async with self._slot(priority):
+                    replayed = False
+                    while index < len(frames):
+                        reused = self.connected
+                        try:
+                            await self._async_open(operation=operation)
+                        except (OSError, asyncio.TimeoutError) as err:
+                            results[index:] = [err] * (len(frames) - index)
+                            break
+
+                        sent, acked, closed = await self._async_stream(
+                            frames,
+                            index,
+                            delay,
+                            ready_at,
+                            ack_timeout,
+                            results,
+                            operation,
+                            progress,
+                        )
+                        if sent == index:
+                            if reused and closed and not replayed:
+                                # Stale socket, closed before anything was
+                                # written: retry once on a fresh one.
+                                replayed = True
+                                self.metrics.record_retry(operation)
+                                continue
+                            results[index:] = [
+                                ConnectionError("Connection lost before sending")
+                            ] * (len(frames) - index)
+                            break
+                        index = sent
+                outcome["ok"] = not any(isinstance(r, Exception) for r in results)
+        finally:
+            # Frames that never went out give their reservations back.
+            self.limiter.refund(ready_at[progress["written"] :])
+        return results
+
+    async def _async_stream(
+        self,
+        frames: Sequence[bytes],
+        start: int,
+        delay: float,
+        ready_at: Sequence[float],
+        ack_timeout: float,
+        results: list,
+        operation: str,
+        progress: dict[str, int],
+    ) -> tuple[int, int, bool]:
+        """Pipeline frames from `start` on the open socket.
+
+        Frame i is written no earlier than `ready_at[i]`, and frames after
+        the first at least `delay` seconds apart. `progress["written"]`
+        tracks how many frames have reached the socket.
+
+        Return how far writing got, how many acknowledgements arrived and
+        whether the connection was lost (closed by the device or failing a
+        write).
+        """
+        reader, writer = self._reader, self._writer
+        unacked: deque[int] = deque()
+        drained = asyncio.Event()
+        acked = 0
+        first_written = 0.0
+
+        async def collect() -> None:
+            nonlocal acked
+            parser = FrameParser()
+            while True:
+                chunk = await reader.read(1024)
+                if not chunk:
+                    return
+                if not acked and first_written:
+                    self._record(
+                        operation, "first_byte", time.monotonic() - first_written
+                    )
+                for frame in parser.feed(chunk):
+                    if unacked:
+                        results[unacked.popleft()] = frame
+                        acked += 1
+                    if not unacked:
+                        drained.set()
+
+        collector = asyncio.create_task(collect())
+        sent = start
+        error: Exception = asyncio.TimeoutError("No acknowledgement from device")
+        write_failed = False
+        try:
+            while sent < len(frames):
+                if sent and delay:
+                    await asyncio.sleep(delay)
+                await _sleep_until(ready_at[sent])
+                if collector.done():
+                    break
+                unacked.append(sent)
+                drained.clear()
+                began = time.monotonic()
+                writer.write(frames[sent])
+                progress["written"] = max(progress["written"], sent + 1)
+                self.limiter.release(ready_at[sent])
+                await writer.drain()
+                if not first_written:
+                    first_written = time.monotonic()
+                    self._record(operation, "write", first_written - began)
+                sent += 1
+
+            if unacked and not collector.done():
+                waiter = asyncio.ensure_future(drained.wait())
+                await asyncio.wait(
+                    (waiter, collector),
+                    timeout=ack_timeout,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                waiter.cancel()
+        except OSError as err:
+            error = err
+            write_failed = True
+        finally:
+            closed = write_failed or collector.done()
+            collector.cancel()
+            try:
+                await collector
+            except asyncio.CancelledError:
+                pass
+            except OSError as err:
+                error = err
+
+        if closed and isinstance(error, asyncio.TimeoutError):
+            error = ConnectionError("Connection closed by device")
+        for index in unacked:
+            results[index] = error
+        if unacked or closed:
+            await self.async_close()
+        return sent, acked, closed
+
+    @asynccontextmanager
+    async def session(self, priority: int = PRIORITY_LEARN):
+        """Hold the connection exclusively and yield its (reader, writer).
+
+        Used for exchanges that are not a single request/response, such as
+        learning. The socket is closed if the exchange raises.
+        """
+        operation = PRIORITY_NAMES[priority]
+        async with self._measure(operation):
+            async with self._slot(priority):
+                await self._async_open(operation=operation)
+                try:
+                    yield self._reader, self._writer
+                except BaseException:
+                    await self.async_close()
+                    raise
+
+    @asynccontextmanager
+    async def _slot(self, priority: int):
+        """Hold a scheduler slot, tracing the time spent waiting for it."""
+        start = time.monotonic()
+        async with self.scheduler.slot(priority):
+            add_phase("queue", time.monotonic() - start)
+            yield
+
+    def _record(self, operation: str, phase: str, seconds: float) -> None:
+        self.metrics.record(operation, phase, seconds)
+        if phase in TRACE_PHASES:
+            add_phase(TRACE_PHASES[phase], seconds)
+
+    @asynccontextmanager
+    async def _measure(self, operation: str):
+        """Record total time (queue wait included) and outcome of the body.
+
+        The body may set `ok` in the yielded dict to False to count a
+        failure that did not raise. Cancellation is not counted.
+        """
+        start = time.monotonic()
+        outcome = {"ok": True}
+        try:
+            yield outcome
+        except asyncio.CancelledError:
+            raise
+        except BaseException:
+            self.metrics.record_outcome(operation, False)
+            raise
+        self._record(operation, "total", time.monotonic() - start)
+        self.metrics.record_outcome(operation, outcome["ok"])
+
+    async def _async_open(
+        self, timeout: float = CONNECT_TIMEOUT, operation: str | None = None
+    ) -> None:
+        if self.connected:
+            return
+        await self.async_close()
+        start = time.monotonic()
+        self._reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(self._host, self.port), timeout=timeout
+        )
+        if operation is not None:
+            self._record(operation, "connect", time.monotonic() - start)
+        _enable_keepalive(self._writer.get_extra_info("socket"))
+        _LOGGER.debug("Opened WFIREX4 connection to %s:%s", self._host, self.port)
+
+    def _abort(self) -> None:
+        writer = self._writer
+        self._reader = self._writer = None
+        if writer is not None:
+            writer.close()
+
+
+def _enable_keepalive(sock) -> None:
+    """Let the kernel notice a held socket whose peer silently went away."""
+    if sock is None:
+        return
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        for option, value in (
+            ("TCP_KEEPIDLE", KEEPALIVE_IDLE),
+            ("TCP_KEEPINTVL", KEEPALIVE_INTERVAL),
+            ("TCP_KEEPCNT", KEEPALIVE_COUNT),
+        ):
+            if hasattr(socket, option):
+                sock.setsockopt(socket.IPPROTO_TCP, getattr(socket, option), value)
+    except OSError as err:
+        _LOGGER.debug("Could not enable TCP keepalive: %s", err)
@@ -6,9 +6,21 @@ PORT = 60001
 
 CONF_TEMP_OFFSET = "temp_offset"
 CONF_HUMI_OFFSET = "humi_offset"
+CONF_ADAPTIVE_POLLING = "adaptive_polling"
+CONF_MAX_SCAN_INTERVAL = "max_scan_interval"
+CONF_TRACE_THRESHOLD = "trace_threshold"
+CONF_SEND_RATE = "send_rate"
+CONF_SEND_BURST = "send_burst"
+CONF_SEND_QUEUE = "send_queue"
 
 DEFAULT_NAME = "RS-WFIREX4"
 
 DEFAULT_SCAN_INTERVAL = 60
 DEFAULT_TEMP_OFFSET = 0.0
 DEFAULT_HUMI_OFFSET = 0.0
+DEFAULT_ADAPTIVE_POLLING = False
+DEFAULT_MAX_SCAN_INTERVAL = 600
+DEFAULT_TRACE_THRESHOLD = 0  # Milliseconds; 0 disables tracing.
+DEFAULT_SEND_RATE = 4.0  # IR frames per second; 0 disables the limiter.
+DEFAULT_SEND_BURST = 8  # Frames sent back to back before pacing starts.
+DEFAULT_SEND_QUEUE = 16  # Frames allowed to wait before sends are rejected.
@@ -0,0 +1,44 @@
+"""Diagnostics support for the rs_wfirex4 integration."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_HOST, CONF_MAC
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.device_registry import format_mac
+
+from .codes import get_code_repository
+from .const import DOMAIN
+from .tracing import get_tracer
+
+TO_REDACT = {CONF_HOST, CONF_MAC, "mac"}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    mac = format_mac(entry.data.get(CONF_MAC, ""))
+    connection = hass.data.get(DOMAIN, {}).get("connections", {}).get(mac)
+    tracer = get_tracer(hass, mac)
+
+    diagnostics: dict[str, Any] = {
+        "entry": {"data": dict(entry.data), "options": dict(entry.options)},
+        "tracing": {
+            "threshold_ms": round(tracer.threshold * 1000),
+            "slow_operations": list(tracer.slow),
+        },
+        "codes": get_code_repository(hass).dedup_stats(),
+    }
+    if connection is not None:
+        diagnostics["connection"] = {
+            "connected": connection.connected,
+            "queue_depth": connection.scheduler.depth,
+            "queue": connection.scheduler.stats(),
+            "send_limiter": connection.limiter.stats(),
+            "metrics": connection.metrics.as_dict(),
+        }
+    return async_redact_data(diagnostics, TO_REDACT)
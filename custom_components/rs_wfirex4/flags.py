@@ -0,0 +1,83 @@
+"""Domain-wide store for the toggle flags of every RS-WFIREX4 remote."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import defaultdict
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .helpers import get_domain_object, load_once
+
+_LOGGER = logging.getLogger(__name__)
+
+FLAG_STORAGE_VERSION = 1
+FLAG_STORAGE_KEY = "rs_wfirex4_flags"
+FLAG_SAVE_DELAY = 15
+LEGACY_FLAG_STORAGE_KEY = "rs_wfirex4_{}_flags"  # Per-MAC, colons removed.
+
+
+def get_flag_store(hass: HomeAssistant) -> Wfirex4FlagStore:
+    """Return the shared flag store."""
+    return get_domain_object(hass, "flags", Wfirex4FlagStore, hass)
+
+
+class Wfirex4FlagStore:
+    """Keep the toggle flags of all remotes in one file.
+
+    Each remote mutates the dict it gets from `async_flags` and then calls
+    `async_schedule_save`; changes from every device within one debounce
+    window are written together. Store flushes a pending write when Home
+    Assistant shuts down.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the store (nothing is read until async_load)."""
+        self.hass = hass
+        self._store = Store(hass, FLAG_STORAGE_VERSION, FLAG_STORAGE_KEY)
+        self._flags: dict[str, defaultdict[str, int]] = {}
+        self._load_task: asyncio.Task | None = None
+
+    async def async_flags(self, mac: str) -> defaultdict[str, int]:
+        """Return the live flag dict of one remote (device -> 0/1)."""
+        await self.async_load()
+        key = mac.replace(":", "")
+        flags = self._flags.get(key)
+        if flags is None:
+            flags = self._flags[key] = defaultdict(int)
+            await self._async_migrate_legacy(key, flags)
+        return flags
+
+    @callback
+    def async_schedule_save(self) -> None:
+        """Write all flags after the shared debounce window."""
+        self._store.async_delay_save(self._data_to_save, FLAG_SAVE_DELAY)
+
+    def _data_to_save(self) -> dict:
+        return {key: dict(flags) for key, flags in self._flags.items() if flags}
+
+    @load_once
+    async def async_load(self) -> None:
+        """Load the flags of every remote."""
+        data = await self._store.async_load() or {}
+        for key, flags in data.items():
+            self._flags[key] = defaultdict(
+                int, {device: int(flag) for device, flag in flags.items()}
+            )
+
+    async def _async_migrate_legacy(self, key: str, flags: dict) -> None:
+        """Import and remove the per-MAC store used by earlier versions."""
+        legacy = Store(
+            self.hass, FLAG_STORAGE_VERSION, LEGACY_FLAG_STORAGE_KEY.format(key)
+        )
+        data = await legacy.async_load()
+        if data is None:
+            return
+        flags.update({device: int(flag) for device, flag in data.items()})
+        _LOGGER.debug("Migrated toggle flags of %s to the shared store", key)
+        # Persist before deleting the source, so a restart inside the debounce
+        # window cannot lose the migrated flags.
+        await self._store.async_save(self._data_to_save())
+        await legacy.async_remove()
@@ -1,16 +1,74 @@
 """Helper utilities for rs_wfirex4 integration."""
 
 import asyncio
+import functools
 import logging
+from collections.abc import Awaitable, Callable
+from typing import Any, TypeVar
 
 from homeassistant.core import HomeAssistant
-from homeassistant.helpers import device_registry as dr
 from homeassistant.helpers.device_registry import DeviceInfo, format_mac
 
+from .connection import Wfirex4Connection, read_frame
 from .const import DEFAULT_NAME, DOMAIN, PORT
+from .tracing import get_tracer, phase
 
 _LOGGER = logging.getLogger(__name__)
 
+PROBE_TIMEOUT = 5.0  # Whole connection race, all candidates.
+PROBE_STAGGER = 0.25  # Head start of each candidate over the next.
+
+# (host, reader, writer, response frame) of a connection probe.
+_ProbeResult = tuple[
+    str, asyncio.StreamReader | None, asyncio.StreamWriter | None, bytes | None
+]
+
+_T = TypeVar("_T")
+
+
+def get_domain_object(
+    hass: HomeAssistant, key: str, factory: Callable[..., _T], *args: Any
+) -> _T:
+    """Return hass.data[DOMAIN][key], creating it as factory(*args) on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    obj = domain_data.get(key)
+    if obj is None:
+        obj = domain_data[key] = factory(*args)
+    return obj
+
+
+def get_device_object(
+    hass: HomeAssistant, key: str, mac: str, factory: Callable[..., _T], *args: Any
+) -> _T:
+    """Return the per-device object under `key`, creating it on first use.
+
+    The MAC is normalized and passed to the factory last: factory(*args, mac).
+    """
+    mac = format_mac(mac)
+    objects = hass.data.setdefault(DOMAIN, {}).setdefault(key, {})
+    obj = objects.get(mac)
+    if obj is None:
+        obj = objects[mac] = factory(*args, mac)
+    return obj
+
+
+def load_once(
+    load: Callable[[Any], Awaitable[None]],
+) -> Callable[[Any], Awaitable[None]]:
+    """Make an async load method run once per instance.
+
+    The first call starts the load as a task; concurrent and later callers
+    await that same task. The instance needs `hass` and `_load_task = None`.
+    """
+
+    @functools.wraps(load)
+    async def async_load(self) -> None:
+        if self._load_task is None:
+            self._load_task = self.hass.async_create_task(load(self))
+        await self._load_task
+
+    return async_load
+
 
 def build_device_info(mac: str, name: str | None = None) -> DeviceInfo:
     """Return DeviceInfo for a device identified by its MAC."""
@@ -27,55 +85,172 @@ def build_default_name_with_mac(mac: str):
     return f"{DEFAULT_NAME} ({format_mac(mac)[-8:].replace(':', '')})"
 
 
-async def resolve_ip_by_mac(hass, mac: str) -> str | None:
-    """Resolve IP by MAC address using HomeAssistant's device registry."""
-    mac = mac.lower()
-    dev_reg = dr.async_get(hass)
+def get_connection(hass: HomeAssistant, host: str, mac: str) -> Wfirex4Connection:
+    """Return the shared connection of a device."""
+    return get_device_object(hass, "connections", mac, Wfirex4Connection, host)
 
-    for device in dev_reg.devices.values():
-        for conn in device.connections:
-            if conn[1].lower() == mac:
-                if device.ip_addresses:
-                    return device.ip_addresses[0]
 
-    return None
+def _get_address_book(hass: HomeAssistant):
+    # Imported here because addresses builds on the helpers above.
+    from .addresses import get_address_book
 
+    return get_address_book(hass)
 
-async def test_connection(hass: HomeAssistant, host: str, mac: str) -> str | None:
+
+async def resolve_ip_by_mac(hass, mac: str) -> str | None:
+    """Resolve IP by MAC address from the device registry index.
+
+    Falls back to the last IP the device was reached at.
     """
-    Try connecting to host:60001.
-    If fails, attempt resolve_ip_by_mac and return new IP if successful.
+    with get_tracer(hass, mac).trace("resolve"), phase("resolve"):
+        book = _get_address_book(hass)
+        await book.async_load()
+        return book.lookup(mac)
+
+
+async def test_connection(
+    hass: HomeAssistant, host: str, mac: str, *, adopt: bool = True
+) -> str | None:
+    """
+    Find the address the device answers at on port 60001.
+    The configured host, the registry IP and the last known IP are probed at
+    the same time (each with a short head start over the next); the first
+    connection wins, the others are cancelled, and the winning socket is
+    handed to the shared per-device connection so the next request does not
+    pay another handshake. With adopt=False (a unit no entry owns yet) the
+    shared pool is left alone and the winning socket is closed.
     Return:
       - host (str): confirmed reachable host
-      - new_host (str): resolved IP when host=NG but MAC=OK
+      - new_host (str): another candidate IP when host=NG but MAC=OK
       - None → connection failed completely
     """
+    result = await async_probe(hass, host, mac, adopt=adopt)
+    return result[0] if result else None
 
-    # 1. First try configured host
-    if host:
-        try:
-            _, writer = await asyncio.wait_for(
-                asyncio.open_connection(host, PORT), timeout=5
-            )
-            writer.close()
-            await writer.wait_closed()
-            return host
-        except Exception:
-            _LOGGER.debug("Connection test failed for %s", host)
 
-    # 2. Resolve by MAC (fallback)
+async def async_probe(
+    hass: HomeAssistant,
+    host: str,
+    mac: str,
+    request: bytes | None = None,
+    *,
+    adopt: bool = True,
+) -> tuple[str, bytes | None] | None:
+    """Race the candidate addresses like test_connection, optionally asking.
+
+    With `request`, each probe writes it as soon as it connects and the
+    first probe to get a response frame back wins, so the probe's one round
+    trip also yields the device's answer. Return (host, frame) — frame is
+    None if the winner connected but did not answer — or None if no
+    candidate connected.
+    """
+    if adopt:
+        connection = get_connection(hass, host, mac)
+    else:
+        connections = hass.data.get(DOMAIN, {}).get("connections", {})
+        connection = connections.get(format_mac(mac))
+    if (
+        request is None
+        and host
+        and connection is not None
+        and connection.connected
+        and connection.host == host
+    ):
+        return host, None
+
+    candidates = [host] if host else []
+    if mac:
+        book = _get_address_book(hass)
+        await book.async_load()
+        candidates += [book.registry_ip(mac), book.last_known(mac)]
+    candidates = [ip for ip in dict.fromkeys(candidates) if ip]
+    if not candidates:
+        return None
+
+    port = connection.port if connection is not None else PORT
+    winner = await _race_connect(candidates, port, PROBE_TIMEOUT, request)
+    if winner is None:
+        _LOGGER.debug("Connection test failed for %s", ", ".join(candidates))
+        return None
+
+    new_host, reader, writer, frame = winner
+    if new_host != host:
+        _LOGGER.warning("Resolved new IP %s for MAC %s", new_host, mac)
+    if not adopt:
+        if writer is not None:
+            writer.close()
+    elif writer is not None:
+        await connection.async_adopt(new_host, reader, writer)
+    else:
+        await connection.async_set_host(new_host)
     if mac:
+        _get_address_book(hass).async_remember(mac, new_host)
+    return new_host, frame
+
+
+async def _race_connect(
+    hosts: list[str], port: int, timeout: float, request: bytes | None
+) -> _ProbeResult | None:
+    """Connect to every host at once and return the first that answers.
+
+    A probe whose request goes unanswered still counts as reachable, but
+    only wins if no other probe gets an answer; its socket is closed since
+    a late reply could still arrive on it.
+    """
+
+    async def probe(host: str, delay: float):
+        if delay:
+            await asyncio.sleep(delay)
+        reader, writer = await asyncio.open_connection(host, port)
+        if request is None:
+            return host, reader, writer, None
         try:
-            new_ip = await resolve_ip_by_mac(hass, mac)
-            if new_ip:
-                _LOGGER.warning("Resolved new IP %s for MAC %s", new_ip, mac)
-                _, writer = await asyncio.wait_for(
-                    asyncio.open_connection(new_ip, PORT), timeout=5
-                )
-                writer.close()
-                await writer.wait_closed()
-                return new_ip
-        except Exception:
-            _LOGGER.debug("Connection test via MAC %s failed", mac)
-
-    return None
+            writer.write(request)
+            await writer.drain()
+            frame = await read_frame(reader, timeout)
+        except (OSError, asyncio.TimeoutError) as err:
+            _LOGGER.debug("No answer from %s: %s", host, err)
+            frame = b""
+        except BaseException:
+            # Cancelled by a faster probe: nobody else will see this socket.
+            writer.close()
+            raise
+        if not frame:
+            writer.close()
+            return host, None, None, None
+        return host, reader, writer, frame
+
+    pending = {
+        asyncio.create_task(probe(host, index * PROBE_STAGGER))
+        for index, host in enumerate(hosts)
+    }
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    winner = fallback = None
+    try:
+        while pending and winner is None:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            done, pending = await asyncio.wait(
+                pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is not None:
+                    _LOGGER.debug("Probe failed: %s", task.exception())
+                elif request is not None and task.result()[3] is None:
+                    fallback = fallback or task.result()
+                elif winner is None:
+                    winner = task.result()
+                else:
+                    task.result()[2].close()
+    finally:
+        for task in pending:
+            task.cancel()
+        # Cancelled probes close their own sockets; a probe that finished
+        # just as it was cancelled still returns one.
+        results = await asyncio.gather(*pending, return_exceptions=True)
+        for result in results:
+            if isinstance(result, tuple) and result[2] is not None:
+                result[2].close()
+    return winner or fallback
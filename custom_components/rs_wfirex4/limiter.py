@@ -0,0 +1,167 @@
+"""Per-device token bucket pacing the IR frames sent to an RS-WFIREX4."""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Callable, Sequence
+
+from homeassistant.core import CALLBACK_TYPE
+from homeassistant.exceptions import HomeAssistantError
+
+from .const import DEFAULT_SEND_BURST, DEFAULT_SEND_QUEUE, DEFAULT_SEND_RATE
+
+
+class SendRateLimited(HomeAssistantError):
+    """Raised when a send is shed because too many frames are already waiting."""
+
+
+class Wfirex4SendLimiter:
+    """Admit IR frames at `rate` per second after an initial `burst`.
+
+    The bucket is kept as a theoretical arrival time (GCRA, the virtual
+    scheduling form of a token bucket), so a batch can be scheduled frame by
+    frame without simulating refills. Frames of one batch are at least
+    `delay` apart and draw on the burst like separate sends: on an idle unit
+    the first `burst` go out at once, the rest at `rate`. That pacing of a
+    batch's own frames never counts as queuing, so a long batch is not
+    rejected. Frames that other sends push past it wait for a token; they
+    are the queue. A batch that would put more than `max_queue` frames in
+    the queue is rejected as a whole with SendRateLimited, so a flood of
+    commands is shed instead of piling up behind the device. A rate of 0
+    disables limiting.
+
+    Listeners are called whenever the queue depth or the drop count changes.
+    """
+
+    __slots__ = (
+        "rate",
+        "burst",
+        "max_queue",
+        "sent",
+        "delayed",
+        "dropped",
+        "_tat",
+        "_waiting",
+        "_listeners",
+    )
+
+    def __init__(
+        self,
+        rate: float = DEFAULT_SEND_RATE,
+        burst: int = DEFAULT_SEND_BURST,
+        max_queue: int = DEFAULT_SEND_QUEUE,
+    ) -> None:
+        """Initialize a full bucket."""
+        self.sent = 0
+        self.delayed = 0
+        self.dropped = 0
+        self._listeners: list[Callable[[], None]] | None = None
+        self.configure(rate, burst, max_queue)
+
+    def configure(self, rate: float, burst: int, max_queue: int) -> None:
+        """Apply new limits; the bucket starts full again."""
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.max_queue = max_queue
+        self._tat = 0.0  # Theoretical arrival time of the next frame.
+        self._waiting: list[float] = []  # Release times of queued frames.
+        self._notify()
+
+    @property
+    def depth(self) -> int:
+        """Return the number of frames waiting for a token."""
+        now = time.monotonic()
+        self._waiting = [ready for ready in self._waiting if ready > now]
+        return len(self._waiting)
+
+    def reserve(self, count: int, delay: float = 0) -> list[float]:
+        """Reserve `count` frames sent `delay` apart; return when each may go.
+
+        The times are time.monotonic() values. Raises SendRateLimited,
+        reserving nothing, if the frames would overflow the queue.
+        """
+        now = time.monotonic()
+        if not self.rate:
+            self.sent += count
+            return [now + i * delay for i in range(count)]
+
+        interval = 1 / self.rate
+        tolerance = (self.burst - 1) * interval
+        tat = max(self._tat, now)
+        own_tat = now  # The same batch on an idle unit.
+        ready_at: list[float] = []
+        late: list[float] = []
+        for i in range(count):
+            earliest = ready_at[-1] + delay if i else now
+            paced = max(earliest, own_tat - tolerance)
+            ready = max(earliest, tat - tolerance)
+            if ready > paced:
+                late.append(ready)
+            ready_at.append(ready)
+            tat = max(tat, ready) + interval
+            own_tat = max(own_tat, paced) + interval
+
+        depth = self.depth
+        if depth + len(late) > self.max_queue:
+            self.dropped += count
+            self._notify()
+            raise SendRateLimited(
+                f"Send queue full: {len(late)} more frames would wait behind "
+                f"{depth} (limit {self.max_queue} at {self.rate:g}/s)"
+            )
+
+        self._tat = tat
+        self._waiting.extend(late)
+        self.sent += count
+        self.delayed += len(late)
+        if late:
+            self._notify()
+        return ready_at
+
+    def release(self, ready: float) -> None:
+        """Take a frame reserved for `ready` out of the queue as it goes out."""
+        if ready in self._waiting:
+            self._waiting.remove(ready)
+            self._notify()
+
+    def refund(self, unsent: Sequence[float]) -> None:
+        """Give back the reservations of frames that were never sent.
+
+        `unsent` holds their release times as returned by reserve().
+        """
+        if not unsent or not self.rate:
+            return
+        for ready in unsent:
+            if ready in self._waiting:
+                self._waiting.remove(ready)
+        self._tat = max(self._tat - len(unsent) / self.rate, time.monotonic())
+        self.sent -= len(unsent)
+        self._notify()
+
+    def add_listener(self, listener: Callable[[], None]) -> CALLBACK_TYPE:
+        """Call `listener` on queue changes until the returned callback runs."""
+        if self._listeners is None:
+            self._listeners = []
+        self._listeners.append(listener)
+
+        def remove() -> None:
+            if self._listeners and listener in self._listeners:
+                self._listeners.remove(listener)
+
+        return remove
+
+    def _notify(self) -> None:
+        for listener in self._listeners or ():
+            listener()
+
+    def stats(self) -> dict:
+        """Return the limits and counters as plain values."""
+        return {
+            "rate": self.rate,
+            "burst": self.burst,
+            "max_queue": self.max_queue,
+            "queue_depth": self.depth,
+            "sent": self.sent,
+            "delayed": self.delayed,
+            "dropped": self.dropped,
+        }
@@ -0,0 +1,200 @@
+"""Per-device latency histograms and error counters for RS-WFIREX4 I/O."""
+
+from __future__ import annotations
+
+import bisect
+import time
+from collections import deque
+
+from .scheduler import PRIORITY_NAMES
+
+# Upper bounds (seconds) of the histogram buckets; one overflow bucket
+# follows. Roughly 1-2-5 steps from 1 ms to 30 s.
+BUCKET_BOUNDS = (
+    0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2,
+    0.5, 1.0, 2.0, 5.0, 10.0, 30.0,
+)  # fmt: skip
+
+PHASES = ("connect", "write", "first_byte", "total")
+OPERATIONS = tuple(PRIORITY_NAMES.values())
+
+OUTCOME_WINDOW = 100  # Recent operations the failure rate is taken over.
+RETRY_WINDOW = 3600.0  # Seconds covered by retries_per_hour.
+MAX_RETRY_EVENTS = 512  # Bound on the retry timestamps kept per operation.
+HISTOGRAM_SLOT = 60.0  # Seconds of samples per histogram window.
+HISTOGRAM_SLOTS = 5  # Windows kept, so latency stats cover the last 5 min.
+
+
+class _Window:
+    """Bucket counts of one HISTOGRAM_SLOT of samples."""
+
+    __slots__ = ("slot", "counts", "count", "max")
+
+    def __init__(self, slot: int) -> None:
+        self.slot = slot
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.max = 0.0
+
+
+class LatencyHistogram:
+    """Rolling latency histogram; percentiles are bucket upper bounds.
+
+    Samples go into per-minute windows, a ring of HISTOGRAM_SLOTS of them,
+    which are merged when read. The statistics therefore cover the last few
+    minutes only, and a slow outlier ages out like any other sample.
+    """
+
+    __slots__ = ("_windows",)
+
+    def __init__(self) -> None:
+        """Initialize an empty histogram (windows are allocated on use)."""
+        self._windows: deque[_Window] | None = None
+
+    def record(self, seconds: float) -> None:
+        """Account for one sample."""
+        slot = int(time.monotonic() // HISTOGRAM_SLOT)
+        if self._windows is None:
+            self._windows = deque(maxlen=HISTOGRAM_SLOTS)
+        if not self._windows or self._windows[-1].slot != slot:
+            self._windows.append(_Window(slot))
+        window = self._windows[-1]
+        window.counts[bisect.bisect_left(BUCKET_BOUNDS, seconds)] += 1
+        window.count += 1
+        if seconds > window.max:
+            window.max = seconds
+
+    def _live(self) -> list[_Window]:
+        """Return the windows that still fall within the rolling period."""
+        if not self._windows:
+            return []
+        oldest = int(time.monotonic() // HISTOGRAM_SLOT) - HISTOGRAM_SLOTS + 1
+        while self._windows and self._windows[0].slot < oldest:
+            self._windows.popleft()
+        return list(self._windows)
+
+    @property
+    def count(self) -> int:
+        """Return the number of samples in the rolling period."""
+        return sum(window.count for window in self._live())
+
+    @property
+    def max(self) -> float:
+        """Return the largest sample in the rolling period (0 without any)."""
+        return max((window.max for window in self._live()), default=0.0)
+
+    def percentile(self, percent: float) -> float | None:
+        """Return an upper estimate of the percentile, None without samples."""
+        windows = self._live()
+        count = sum(window.count for window in windows)
+        if not count:
+            return None
+        largest = max(window.max for window in windows)
+        rank = percent / 100 * count
+        seen = 0
+        for index in range(len(BUCKET_BOUNDS) + 1):
+            bucket = sum(window.counts[index] for window in windows)
+            seen += bucket
+            if seen >= rank and bucket:
+                if index == len(BUCKET_BOUNDS):
+                    return largest
+                return min(BUCKET_BOUNDS[index], largest)
+        return largest
+
+    def as_dict(self) -> dict:
+        """Return p50/p95/max in milliseconds."""
+        count = self.count
+        return {
+            "count": count,
+            "p50_ms": _ms(self.percentile(50)),
+            "p95_ms": _ms(self.percentile(95)),
+            "max_ms": _ms(self.max if count else None),
+        }
+
+
+class OperationMetrics:
+    """Histograms per phase plus retry and failure counters of one operation."""
+
+    __slots__ = ("phases", "attempts", "failures", "retries", "_outcomes", "_retries")
+
+    def __init__(self) -> None:
+        """Initialize empty metrics."""
+        self.phases = {phase: LatencyHistogram() for phase in PHASES}
+        self.attempts = 0
+        self.failures = 0
+        self.retries = 0
+        self._outcomes: deque[bool] = deque(maxlen=OUTCOME_WINDOW)
+        self._retries: deque[float] | None = None  # Allocated on first retry.
+
+    def record_outcome(self, ok: bool) -> None:
+        """Account for one finished operation."""
+        self.attempts += 1
+        if not ok:
+            self.failures += 1
+        self._outcomes.append(ok)
+
+    def record_retry(self) -> None:
+        """Account for one retry or replay."""
+        self.retries += 1
+        if self._retries is None:
+            self._retries = deque(maxlen=MAX_RETRY_EVENTS)
+        self._retries.append(time.monotonic())
+
+    @property
+    def retries_per_hour(self) -> int:
+        """Return the number of retries within the last hour."""
+        if self._retries is None:
+            return 0
+        horizon = time.monotonic() - RETRY_WINDOW
+        while self._retries and self._retries[0] < horizon:
+            self._retries.popleft()
+        return len(self._retries)
+
+    @property
+    def failure_rate(self) -> float | None:
+        """Return the failed share of recent operations in percent."""
+        if not self._outcomes:
+            return None
+        failed = len(self._outcomes) - sum(self._outcomes)
+        return round(failed / len(self._outcomes) * 100, 1)
+
+    def as_dict(self) -> dict:
+        """Return the counters and histogram summaries as plain values."""
+        return {
+            "attempts": self.attempts,
+            "failures": self.failures,
+            "retries": self.retries,
+            "retries_per_hour": self.retries_per_hour,
+            "failure_rate": self.failure_rate,
+            **{phase: hist.as_dict() for phase, hist in self.phases.items()},
+        }
+
+
+class Wfirex4Metrics:
+    """Latency and error metrics of one device, split by operation type."""
+
+    __slots__ = ("operations",)
+
+    def __init__(self) -> None:
+        """Initialize empty metrics for every operation type."""
+        self.operations = {name: OperationMetrics() for name in OPERATIONS}
+
+    def record(self, operation: str, phase: str, seconds: float) -> None:
+        """Record the duration of one phase of an operation."""
+        self.operations[operation].phases[phase].record(seconds)
+
+    def record_outcome(self, operation: str, ok: bool) -> None:
+        """Record whether an operation succeeded."""
+        self.operations[operation].record_outcome(ok)
+
+    def record_retry(self, operation: str) -> None:
+        """Record a retry of an operation."""
+        self.operations[operation].record_retry()
+
+    def as_dict(self) -> dict:
+        """Return every operation's metrics as plain values."""
+        return {name: ops.as_dict() for name, ops in self.operations.items()}
+
+
+def _ms(seconds: float | None) -> float | None:
+    return None if seconds is None else round(seconds * 1000, 1)
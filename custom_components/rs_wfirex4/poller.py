@@ -0,0 +1,162 @@
+"""Domain-wide staggered poll scheduling for RS-WFIREX4 sensors."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import time
+from collections.abc import Callable
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+
+from .const import DOMAIN
+from .helpers import get_domain_object
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_POLL_CONCURRENCY = 4  # Poll exchanges on the wire at once, fleet-wide.
+MIN_POLL_INTERVAL = 1.0  # Seconds; shorter intervals are clamped to this.
+
+
+def get_poll_engine(hass: HomeAssistant) -> Wfirex4PollEngine:
+    """Return the shared poll engine."""
+    return get_domain_object(hass, "poller", Wfirex4PollEngine, hass)
+
+
+class _PolledDevice:
+    """Scheduling state of one device."""
+
+    __slots__ = ("coordinator", "interval", "next_interval", "offset", "due", "cancel")
+
+    def __init__(
+        self,
+        coordinator: DataUpdateCoordinator,
+        interval: float,
+        next_interval: Callable[[], float] | None,
+    ) -> None:
+        self.coordinator = coordinator
+        self.interval = interval
+        self.next_interval = next_interval
+        self.offset = 0.0
+        self.due = 0.0
+        self.cancel: CALLBACK_TYPE | None = None
+
+
+class Wfirex4PollEngine:
+    """Drive every device coordinator from one staggered schedule.
+
+    Coordinators are created without an update interval; the engine refreshes
+    them instead. Devices are spread evenly across their interval (device i
+    of n polls at i/n of the interval), so the fleet never polls in one
+    burst. Fetchers hold `exchange_limit` around each wire exchange, so at
+    most `max_concurrency` polls talk to devices at once, while retry
+    backoff, address lookups and waiting behind a device's other work do not
+    count against it. Each refresh notifies that device's sensors through
+    its coordinator as usual.
+
+    A device registered with `next_interval` (adaptive polling) is asked for
+    its delay after every poll; while that is longer than the base interval
+    the device leaves its phase slot and polls that long after the last poll.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, max_concurrency: int = DEFAULT_POLL_CONCURRENCY
+    ) -> None:
+        """Initialize an engine with no devices."""
+        self.hass = hass
+        self._devices: dict[str, _PolledDevice] = {}
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._epoch = time.monotonic()
+        self._stopped = False
+
+    @property
+    def exchange_limit(self) -> asyncio.Semaphore:
+        """Return the fleet-wide limit to hold around one poll exchange."""
+        return self._semaphore
+
+    @callback
+    def async_add(
+        self,
+        mac: str,
+        coordinator: DataUpdateCoordinator,
+        interval: float,
+        next_interval: Callable[[], float] | None = None,
+    ) -> None:
+        """Start (or update) polling of a device every `interval` seconds."""
+        self.async_remove(mac)
+        interval = max(interval, MIN_POLL_INTERVAL)
+        self._devices[mac] = _PolledDevice(coordinator, interval, next_interval)
+        self._spread()
+
+    @callback
+    def async_remove(self, mac: str) -> None:
+        """Stop polling a device."""
+        device = self._devices.pop(mac, None)
+        if device is None:
+            return
+        if device.cancel is not None:
+            device.cancel()
+        self._spread()
+
+    @callback
+    def async_stop(self) -> None:
+        """Cancel every pending poll."""
+        self._stopped = True
+        for device in self._devices.values():
+            if device.cancel is not None:
+                device.cancel()
+                device.cancel = None
+
+    @callback
+    def _spread(self) -> None:
+        """Assign evenly spaced phase offsets and reschedule every device."""
+        now = time.monotonic()
+        count = len(self._devices)
+        for index, mac in enumerate(sorted(self._devices)):
+            device = self._devices[mac]
+            device.offset = device.interval * index / count
+            # Next slot epoch + offset + k * interval that lies in the future.
+            slots = math.floor((now - self._epoch - device.offset) / device.interval)
+            device.due = self._epoch + device.offset + (slots + 1) * device.interval
+            self._schedule(mac, device, now)
+        _LOGGER.debug("Polling %d device(s) on a staggered schedule", count)
+
+    @callback
+    def _schedule(self, mac: str, device: _PolledDevice, now: float) -> None:
+        if device.cancel is not None:
+            device.cancel()
+
+        @callback
+        def _fire(_now) -> None:
+            device.cancel = None
+            self.hass.async_create_background_task(
+                self._async_poll(mac, device), f"{DOMAIN} poll {mac}"
+            )
+
+        device.cancel = async_call_later(
+            self.hass, max(0.0, device.due - now), _fire
+        )
+
+    async def _async_poll(self, mac: str, device: _PolledDevice) -> None:
+        try:
+            await device.coordinator.async_refresh()
+        finally:
+            if (
+                not self._stopped
+                and self._devices.get(mac) is device
+                and device.cancel is None
+            ):
+                now = time.monotonic()
+                interval = device.interval
+                if device.next_interval is not None:
+                    interval = max(device.next_interval(), MIN_POLL_INTERVAL)
+                if interval > device.interval:
+                    device.due = now + interval
+                else:
+                    # Keep the phase: step whole intervals from the previous slot.
+                    while device.due <= now:
+                        device.due += device.interval
+                self._schedule(mac, device, now)
@@ -6,7 +6,6 @@ import re
 from base64 import b64decode
 from collections import defaultdict
 from itertools import product
-from typing import Any
 
 import homeassistant.helpers.config_validation as cv
 import voluptuous as vol
@@ -16,6 +15,7 @@ from homeassistant.components.remote import (
     ATTR_DELAY_SECS,
     ATTR_DEVICE,
     ATTR_NUM_REPEATS,
+    ATTR_TIMEOUT,
     DEFAULT_DELAY_SECS,
     RemoteEntity,
     RemoteEntityFeature,
@@ -24,14 +24,23 @@ from homeassistant.const import ATTR_COMMAND, CONF_HOST, CONF_MAC, CONF_NAME
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers.device_registry import format_mac
-from homeassistant.helpers.storage import Store
 
-from .const import DEFAULT_NAME, DOMAIN, PORT
-from .helpers import build_default_name_with_mac, build_device_info
+from .codec import LEARN_REQUEST, decode_learned_code, encode_ir_frame
+from .codes import Wfirex4CodeRepository, get_code_repository
+from .connection import Wfirex4Connection, read_sized_frame
+from .const import DEFAULT_NAME, DOMAIN
+from .flags import Wfirex4FlagStore, get_flag_store
+from .helpers import build_default_name_with_mac, build_device_info, get_connection
+from .limiter import SendRateLimited
+from .scheduler import PRIORITY_SEND, SchedulerFull
+from .tracing import get_tracer, phase
 
-CODE_STORAGE_VERSION = 1
-FLAG_STORAGE_VERSION = 1
-FLAG_SAVE_DELAY = 15
+SEND_READ_TIMEOUT = 4.0  # A reused socket may be half-open; don't wait forever.
+DEFAULT_LEARN_TIMEOUT = 30  # Seconds to wait for the button press per code.
+READY_TIMEOUT = 10.0  # Seconds an early command waits for storage to load.
+
+# A raw IR code given as hex instead of a learned command name.
+RAW_CODE_PATTERN = re.compile(r"^[0-9a-f]{32,}$")
 
 COMMAND_SCHEMA = vol.Schema(
     {
@@ -49,10 +58,17 @@ SERVICE_SEND_SCHEMA = COMMAND_SCHEMA.extend(
     }
 )
 
+SERVICE_DELETE_SCHEMA = COMMAND_SCHEMA.extend(
+    {
+        vol.Required(ATTR_DEVICE): vol.All(cv.string, vol.Length(min=1)),
+    }
+)
+
 SERVICE_LEARN_SCHEMA = COMMAND_SCHEMA.extend(
     {
         vol.Required(ATTR_DEVICE): vol.All(cv.string, vol.Length(min=1)),
         vol.Optional(ATTR_ALTERNATIVE, default=False): cv.boolean,
+        vol.Optional(ATTR_TIMEOUT, default=DEFAULT_LEARN_TIMEOUT): cv.positive_int,
     }
 )
 
@@ -68,11 +84,11 @@ async def async_setup_entry(hass: HomeAssistant, entry, async_add_entities):
     name = data.get(CONF_NAME, build_default_name_with_mac(mac))
 
     remote_entity = Wfirex4Remote(
-        host,
+        get_connection(hass, host, mac),
         mac,
         name,
-        Store(hass, CODE_STORAGE_VERSION, "rs_wfirex4_codes"),
-        Store(hass, FLAG_STORAGE_VERSION, f"rs_wfirex4_{mac.replace(':', '')}_flags"),
+        get_code_repository(hass),
+        get_flag_store(hass),
     )
     async_add_entities([remote_entity], update_before_add=False)
     hass.async_create_task(remote_entity.async_load_storage_files())
@@ -81,23 +97,32 @@ async def async_setup_entry(hass: HomeAssistant, entry, async_add_entities):
 class Wfirex4Remote(RemoteEntity):
     """Representation of a RS-WFIREX4 remote."""
 
-    def __init__(self, host: str, mac: str, name: str, code, flag):
+    _attr_icon = "mdi:remote"
+    _attr_should_poll = False
+    _attr_supported_features = (
+        RemoteEntityFeature.LEARN_COMMAND | RemoteEntityFeature.DELETE_COMMAND
+    )
+
+    def __init__(
+        self,
+        connection: Wfirex4Connection,
+        mac: str,
+        name: str,
+        codes: Wfirex4CodeRepository,
+        flags: Wfirex4FlagStore,
+    ):
         """Initialize the RS-WFIREX4 Remote."""
         self._name = name or DEFAULT_NAME
-        self._host = host
-        self._port = PORT
-        self._code_storege: Store[Any] = code
-        self._flag_storage: Store[Any] = flag
-        self._codes = {}
+        self._mac = mac
+        self._connection = connection
+        self._codes = codes
+        self._flag_store = flags
         self._flags = defaultdict(int)
+        self._ready = asyncio.Event()
         self._attr_is_on = True
-        self._codeRegx = re.compile(r"^[0-9a-f]{32,}$")
 
         self._attr_name = "{} {}".format(self._name, "Remote")
         self._attr_unique_id = "wfirex4_{}_remote".format(mac)
-        self._attr_icon = "mdi:remote"
-        self._attr_should_poll = False
-        self._attr_supported_features = RemoteEntityFeature.LEARN_COMMAND
         self._attr_extra_state_attributes = {}
 
         self._attr_device_info = build_device_info(mac, name)
@@ -113,7 +138,7 @@ class Wfirex4Remote(RemoteEntity):
         self.schedule_update_ha_state()
 
     def get_code(self, command, device):
-        """Get Hex code"""
+        """Get the raw code bytes and its encoded wire frame."""
 
         def data_packet(value):
             """Decode a data packet given for a Broadlink remote."""
@@ -125,30 +150,36 @@ class Wfirex4Remote(RemoteEntity):
 
         if command.startswith("b64:"):
             try:
-                code, is_toggle_cmd = data_packet(command[4:]).hex(), False
+                code, is_toggle_cmd = data_packet(command[4:]), False
             except ValueError as err:
                 raise ValueError("Invalid code") from err
+            frame = encode_ir_frame(code)
 
-        elif self._codeRegx.match(command):
-            code, is_toggle_cmd = command, False
+        elif RAW_CODE_PATTERN.match(command):
+            code, is_toggle_cmd = bytes.fromhex(command), False
+            frame = encode_ir_frame(code)
 
         else:
             if device is None:
                 raise KeyError("You need to specify a device")
 
             try:
-                code = self._codes[device][command]
+                code = self._codes.get_code(device, command)
             except KeyError as err:
                 raise KeyError("Command not found") from err
 
             # For toggle commands, alternate between codes in a list.
             if isinstance(code, list):
-                code = code[self._flags[device]]
+                toggle = self._flags[device]
+                code = code[toggle]
                 is_toggle_cmd = True
             else:
+                toggle = 0
                 is_toggle_cmd = False
 
-        return code, is_toggle_cmd
+            frame = self._codes.get_frame(device, command, toggle)
+
+        return code, frame, is_toggle_cmd
 
     @callback
     def get_flags(self):
@@ -159,93 +190,182 @@ class Wfirex4Remote(RemoteEntity):
         """
         return self._flags
 
+    @property
+    def ready(self) -> bool:
+        """Return True once codes and toggle flags are loaded."""
+        return self._ready.is_set()
+
+    async def async_wait_ready(self, timeout: float = READY_TIMEOUT) -> None:
+        """Wait until storage is loaded; raise HomeAssistantError on timeout."""
+        if self._ready.is_set():
+            return
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError as err:
+            raise HomeAssistantError(
+                f"{self._attr_name} is still loading its codes"
+            ) from err
+
     async def async_load_storage_files(self):
-        """Load codes and toggle flags from storage files."""
+        """Load codes and toggle flags from storage files.
+
+        Commands that arrive earlier wait for this (see async_wait_ready);
+        the entity is ready even if loading fails, so they never hang.
+        """
         try:
-            self._codes.update(await self._code_storege.async_load() or {})
+            # Shared by all remotes; only the first caller touches the disk.
+            await self._codes.async_load()
+            self._flags = await self._flag_store.async_flags(self._mac)
         except HomeAssistantError:
             _LOGGER.error(
                 "Failed to create '%s Remote' entity: Storage error",
                 "{} {}".format(self._name, "Remote"),
             )
-            # self._code_storege = None
+        finally:
+            self._ready.set()
+
+    async def async_added_to_hass(self):
+        """Register the entity for domain-level services."""
+        self.hass.data[DOMAIN].setdefault("remotes", {})[self.entity_id] = self
+        self._update_limiter_attributes()
+        self.async_on_remove(
+            self._connection.limiter.add_listener(self._async_limiter_changed)
+        )
+
+    def _update_limiter_attributes(self) -> None:
+        limiter = self._connection.limiter
+        self._attr_extra_state_attributes["send_queue_depth"] = limiter.depth
+        self._attr_extra_state_attributes["send_dropped"] = limiter.dropped
+
+    @callback
+    def _async_limiter_changed(self) -> None:
+        """Publish the send queue depth as frames are queued and sent."""
+        self._update_limiter_attributes()
+        self.async_write_ha_state()
+
+    async def async_will_remove_from_hass(self):
+        """Unregister the entity from domain-level services."""
+        self.hass.data[DOMAIN].get("remotes", {}).pop(self.entity_id, None)
 
     async def async_send_command(self, command, **kwargs):
         """Send a list of commands to a device."""
         kwargs[ATTR_COMMAND] = command
         kwargs = SERVICE_SEND_SCHEMA(kwargs)
-        commands = kwargs[ATTR_COMMAND]
-        device = kwargs.get(ATTR_DEVICE)
-        repeat = kwargs[ATTR_NUM_REPEATS]
-        delay = kwargs[ATTR_DELAY_SECS]
-
-        last_code = ""
-
+        outcome = await self.async_send_codes(
+            kwargs[ATTR_COMMAND],
+            kwargs.get(ATTR_DEVICE),
+            kwargs[ATTR_NUM_REPEATS],
+            kwargs[ATTR_DELAY_SECS],
+        )
+        failed = [(cmd, err) for cmd, err in outcome if err is not None]
+        # A turned-off remote ignores commands (logged above) without failing.
+        if failed and self._attr_is_on:
+            cmd, err = failed[0]
+            raise HomeAssistantError(
+                f"Failed to send {len(failed)} of {len(outcome)} commands "
+                f"('{cmd}': {err})"
+            ) from err
+
+    async def async_send_codes(
+        self, commands, device=None, repeat=1, delay=DEFAULT_DELAY_SECS
+    ) -> list[tuple[str, Exception | None]]:
+        """Send commands in order and return (command, error) for each send."""
         if not self._attr_is_on:
             _LOGGER.warning(
                 "remote.send_command canceled: %s entity is turned off", self.entity_id
             )
-            return
-
-        should_delay = False
+            err = HomeAssistantError("Entity is turned off")
+            return [(cmd, err) for _, cmd in product(range(repeat), commands)]
 
+        try:
+            await self.async_wait_ready()
+        except HomeAssistantError as err:
+            _LOGGER.error("Failed to send to %s: %s", device, err)
+            return [(cmd, err) for _, cmd in product(range(repeat), commands)]
+
+        # Resolve every code up front so the whole list streams in one session.
+        # Toggle flags advance as if each send succeeds; failures are undone below.
+        outcome: list[tuple[str, Exception | None]] = []
+        batch = []
         for _, cmd in product(range(repeat), commands):
-            if should_delay:
-                await asyncio.sleep(delay)
-
             try:
-                code, is_toggle_cmd = self.get_code(cmd, device)
-
+                code, frame, is_toggle_cmd = self.get_code(cmd, device)
             except (KeyError, ValueError) as err:
                 _LOGGER.error("Failed to send '%s' to %s: %s", cmd, device, err)
-                should_delay = False
+                outcome.append((cmd, err))
                 continue
 
-            try:
-                await self.set_wfirex(code)
-                last_code = code
-
-            except Exception:
-                # @todo
-                continue
-
-            should_delay = True
+            batch.append((len(outcome), code, frame, is_toggle_cmd))
+            outcome.append((cmd, None))
             if is_toggle_cmd:
                 self._flags[device] ^= 1
 
-        self._flag_storage.async_delay_save(self.get_flags, FLAG_SAVE_DELAY)
+        if not batch:
+            return outcome
+
+        results = await self.set_wfirex([item[2] for item in batch], delay)
+
+        last_code = b""
+        for (pos, code, _, is_toggle_cmd), result in zip(batch, results):
+            if isinstance(result, Exception):
+                cmd = outcome[pos][0]
+                _LOGGER.error("Failed to send '%s' to %s: %s", cmd, device, result)
+                outcome[pos] = (cmd, result)
+                if is_toggle_cmd:
+                    self._flags[device] ^= 1
+                continue
+            last_code = code
+
+        if any(is_toggle_cmd for *_, is_toggle_cmd in batch):
+            self._flag_store.async_schedule_save()
 
         if last_code:
-            self._attr_extra_state_attributes["last_command_sent"] = last_code
+            self._attr_extra_state_attributes["last_command_sent"] = last_code.hex()
             self.schedule_update_ha_state()
 
+        return outcome
+
     async def async_learn_command(self, **kwargs):
         """Learn a command to a device."""
         if await self.learn_wfirex(**kwargs):
             self.schedule_update_ha_state()
 
-    async def set_wfirex(self, wave_data_str):
-        self._attr_extra_state_attributes["last_command_result"] = "Pending..."
+    async def async_delete_command(self, **kwargs):
+        """Delete a list of commands from a device."""
+        kwargs = SERVICE_DELETE_SCHEMA(kwargs)
+        commands = kwargs[ATTR_COMMAND]
+        device = kwargs[ATTR_DEVICE]
+        await self.async_wait_ready()
 
-        wave_data = bytes.fromhex(wave_data_str)
-        wave_data_len = len(wave_data)
-        wave_data_len_hex = wave_data_len.to_bytes(2, "big")
+        for command in commands:
+            try:
+                await self._codes.async_delete(device, command)
+            except KeyError:
+                _LOGGER.error("Failed to delete '%s': Command not found", command)
 
-        payload = b"\x11\x00" + wave_data_len_hex + wave_data
-        crc = self.crc8_calc(payload).to_bytes(1, "big")
-        payload_len = len(payload).to_bytes(2, "big")
-        header = b"\xaa" + payload_len
-        send_data = header + payload + crc
+    async def set_wfirex(self, frames: list[bytes], delay: float = 0) -> list:
+        """Stream prebuilt frames to the device over a single session.
 
-        reader, writer = await asyncio.open_connection(self._host, self._port)
-        writer.write(send_data)
-        await writer.drain()
-        data = await reader.read(1024)
-        writer.close()
-        await writer.wait_closed()
+        Returns the acknowledgement frame or the error for each frame.
+        """
+        self._attr_extra_state_attributes["last_command_result"] = "Pending..."
 
-        if data:
-            self._attr_extra_state_attributes["last_command_result"] = data.hex()
+        try:
+            with get_tracer(self.hass, self._mac).trace("send"):
+                results = await self._connection.send_batch(
+                    frames, delay, SEND_READ_TIMEOUT, PRIORITY_SEND
+                )
+        except (SchedulerFull, SendRateLimited) as err:
+            # The device or send queue is full; nothing was sent.
+            results = [err] * len(frames)
+
+        for result in reversed(results):
+            if isinstance(result, bytes):
+                self._attr_extra_state_attributes["last_command_result"] = (
+                    result.hex()
+                )
+                break
+        return results
 
     async def learn_wfirex(self, **kwargs):
         """Learn a list of commands from a remote."""
@@ -253,37 +373,46 @@ class Wfirex4Remote(RemoteEntity):
         commands = kwargs[ATTR_COMMAND]
         device = kwargs[ATTR_DEVICE]
         toggle = kwargs[ATTR_ALTERNATIVE]
+        timeout = kwargs[ATTR_TIMEOUT]
+
+        async def learn_session(command, notify_id):
+            async with self._connection.session() as (reader, writer):
+                with phase("drain"):
+                    writer.write(LEARN_REQUEST)
+                    await writer.drain()
+
+                async_create(
+                    self.hass,
+                    f"Press the '{command}' button.",
+                    title="Learn command",
+                    notification_id=notify_id,
+                )
+
+                # Returns as soon as the announced frame length has
+                # arrived, without waiting for the device to hang up.
+                with phase("read"):
+                    frame = await asyncio.wait_for(
+                        read_sized_frame(reader), timeout=timeout
+                    )
+
+            with phase("parse"):
+                return decode_learned_code(frame)
 
         async def learn_command(command):
-            reader, writer = await asyncio.open_connection(self._host, self._port)
-            writer.write(b"\xaa\x00\x01\x12\x6c")
-            await writer.drain()
-
             notify_id = f"{DOMAIN}_learn_command"
-            async_create(
-                self.hass,
-                f"Press the '{command}' button.",
-                title="Learn command",
-                notification_id=notify_id,
-            )
-
-            data = b""
-            while True:
-                msg = await reader.read(1024)
-                if len(msg) <= 0:
-                    break
-                data += msg
-            writer.close()
-            await writer.wait_closed()
-
-            async_dismiss(self.hass, notification_id=notify_id)
-
-            if data and data[0:1] == b"\xaa":
-                code = data.hex()[16:]
-                self._attr_extra_state_attributes["last_learn"] = code
-                return code
-            else:
-                raise Exception("Did not get the correct response.")
+            tracer = get_tracer(self.hass, self._mac)
+            try:
+                with tracer.trace("learn"):
+                    code = await learn_session(command, notify_id)
+            except asyncio.TimeoutError as err:
+                raise Exception(f"No button press within {timeout} seconds") from err
+            except (asyncio.IncompleteReadError, ValueError) as err:
+                raise Exception("Did not get the correct response.") from err
+            finally:
+                async_dismiss(self.hass, notification_id=notify_id)
+
+            self._attr_extra_state_attributes["last_learn"] = code.hex()
+            return code
 
         if not self._attr_is_on:
             _LOGGER.warning(
@@ -291,286 +420,17 @@ class Wfirex4Remote(RemoteEntity):
             )
             return False
 
-        should_store = False
-
+        await self.async_wait_ready()
         for command in commands:
             try:
                 code = await learn_command(command)
                 if toggle:
                     code = [code, await learn_command(command)]
 
-                self._codes.setdefault(device, {}).update({command: code})
-                should_store = True
+                # Appends one journal record; the library is not rewritten.
+                await self._codes.async_set(device, command, code)
             except Exception as err:
                 _LOGGER.error("Failed to learn '%s': %s", command, err)
                 continue
 
-        if self._code_storege and should_store:
-            await self._code_storege.async_save(self._codes)
-
         return True
-
-    def crc8_calc(self, payload_buf):
-        CRC8Table = [
-            0x00,
-            0x85,
-            0x8F,
-            0x0A,
-            0x9B,
-            0x1E,
-            0x14,
-            0x91,
-            0xB3,
-            0x36,
-            0x3C,
-            0xB9,
-            0x28,
-            0xAD,
-            0xA7,
-            0x22,
-            0xE3,
-            0x66,
-            0x6C,
-            0xE9,
-            0x78,
-            0xFD,
-            0xF7,
-            0x72,
-            0x50,
-            0xD5,
-            0xDF,
-            0x5A,
-            0xCB,
-            0x4E,
-            0x44,
-            0xC1,
-            0x43,
-            0xC6,
-            0xCC,
-            0x49,
-            0xD8,
-            0x5D,
-            0x57,
-            0xD2,
-            0xF0,
-            0x75,
-            0x7F,
-            0xFA,
-            0x6B,
-            0xEE,
-            0xE4,
-            0x61,
-            0xA0,
-            0x25,
-            0x2F,
-            0xAA,
-            0x3B,
-            0xBE,
-            0xB4,
-            0x31,
-            0x13,
-            0x96,
-            0x9C,
-            0x19,
-            0x88,
-            0x0D,
-            0x07,
-            0x82,
-            0x86,
-            0x03,
-            0x09,
-            0x8C,
-            0x1D,
-            0x98,
-            0x92,
-            0x17,
-            0x35,
-            0xB0,
-            0xBA,
-            0x3F,
-            0xAE,
-            0x2B,
-            0x21,
-            0xA4,
-            0x65,
-            0xE0,
-            0xEA,
-            0x6F,
-            0xFE,
-            0x7B,
-            0x71,
-            0xF4,
-            0xD6,
-            0x53,
-            0x59,
-            0xDC,
-            0x4D,
-            0xC8,
-            0xC2,
-            0x47,
-            0xC5,
-            0x40,
-            0x4A,
-            0xCF,
-            0x5E,
-            0xDB,
-            0xD1,
-            0x54,
-            0x76,
-            0xF3,
-            0xF9,
-            0x7C,
-            0xED,
-            0x68,
-            0x62,
-            0xE7,
-            0x26,
-            0xA3,
-            0xA9,
-            0x2C,
-            0xBD,
-            0x38,
-            0x32,
-            0xB7,
-            0x95,
-            0x10,
-            0x1A,
-            0x9F,
-            0x0E,
-            0x8B,
-            0x81,
-            0x04,
-            0x89,
-            0x0C,
-            0x06,
-            0x83,
-            0x12,
-            0x97,
-            0x9D,
-            0x18,
-            0x3A,
-            0xBF,
-            0xB5,
-            0x30,
-            0xA1,
-            0x24,
-            0x2E,
-            0xAB,
-            0x6A,
-            0xEF,
-            0xE5,
-            0x60,
-            0xF1,
-            0x74,
-            0x7E,
-            0xFB,
-            0xD9,
-            0x5C,
-            0x56,
-            0xD3,
-            0x42,
-            0xC7,
-            0xCD,
-            0x48,
-            0xCA,
-            0x4F,
-            0x45,
-            0xC0,
-            0x51,
-            0xD4,
-            0xDE,
-            0x5B,
-            0x79,
-            0xFC,
-            0xF6,
-            0x73,
-            0xE2,
-            0x67,
-            0x6D,
-            0xE8,
-            0x29,
-            0xAC,
-            0xA6,
-            0x23,
-            0xB2,
-            0x37,
-            0x3D,
-            0xB8,
-            0x9A,
-            0x1F,
-            0x15,
-            0x90,
-            0x01,
-            0x84,
-            0x8E,
-            0x0B,
-            0x0F,
-            0x8A,
-            0x80,
-            0x05,
-            0x94,
-            0x11,
-            0x1B,
-            0x9E,
-            0xBC,
-            0x39,
-            0x33,
-            0xB6,
-            0x27,
-            0xA2,
-            0xA8,
-            0x2D,
-            0xEC,
-            0x69,
-            0x63,
-            0xE6,
-            0x77,
-            0xF2,
-            0xF8,
-            0x7D,
-            0x5F,
-            0xDA,
-            0xD0,
-            0x55,
-            0xC4,
-            0x41,
-            0x4B,
-            0xCE,
-            0x4C,
-            0xC9,
-            0xC3,
-            0x46,
-            0xD7,
-            0x52,
-            0x58,
-            0xDD,
-            0xFF,
-            0x7A,
-            0x70,
-            0xF5,
-            0x64,
-            0xE1,
-            0xEB,
-            0x6E,
-            0xAF,
-            0x2A,
-            0x20,
-            0xA5,
-            0x34,
-            0xB1,
-            0xBB,
-            0x3E,
-            0x1C,
-            0x99,
-            0x93,
-            0x16,
-            0x87,
-            0x02,
-            0x08,
-            0x8D,
-        ]
-        payload_length = len(payload_buf)
-        crc = 0
-        for i in range(payload_length):
-            crc = CRC8Table[(crc ^ payload_buf[i]) % 256]
-        return crc
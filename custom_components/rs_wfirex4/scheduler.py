@@ -0,0 +1,132 @@
+"""Per-device prioritized scheduler for RS-WFIREX4 I/O."""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager
+
+from homeassistant.exceptions import HomeAssistantError
+
+# Lower value runs first. Every slot is exclusive, so a learn session holds
+# the device for its whole duration.
+PRIORITY_SEND = 0
+PRIORITY_LEARN = 1
+PRIORITY_POLL = 2
+
+PRIORITY_NAMES = {
+    PRIORITY_SEND: "send",
+    PRIORITY_LEARN: "learn",
+    PRIORITY_POLL: "poll",
+}
+
+MAX_QUEUE_DEPTH = 32  # Waiting operations per device before new ones are refused.
+
+
+class SchedulerFull(HomeAssistantError):
+    """Raised when too many operations are already waiting for a device."""
+
+
+class QueueStats:
+    """Queue-wait counters for one priority class."""
+
+    __slots__ = ("count", "rejected", "total_wait", "max_wait")
+
+    def __init__(self) -> None:
+        """Initialize empty counters."""
+        self.count = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, wait: float) -> None:
+        """Account for one operation that waited `wait` seconds."""
+        self.count += 1
+        self.total_wait += wait
+        if wait > self.max_wait:
+            self.max_wait = wait
+
+    def as_dict(self) -> dict:
+        """Return the counters as plain values."""
+        return {
+            "count": self.count,
+            "rejected": self.rejected,
+            "avg_wait": self.total_wait / self.count if self.count else 0.0,
+            "max_wait": self.max_wait,
+        }
+
+
+class Wfirex4Scheduler:
+    """Serialize device operations, granting the device by priority.
+
+    Operations of the same priority run in arrival order. The device is held
+    for the duration of `slot()`, so no two operations ever overlap on the
+    wire.
+    """
+
+    __slots__ = ("max_depth", "_busy", "_waiters", "_seq", "_stats")
+
+    def __init__(self, max_depth: int = MAX_QUEUE_DEPTH) -> None:
+        """Initialize an idle scheduler."""
+        self.max_depth = max_depth
+        self._busy = False
+        self._waiters: list[list] = []
+        self._seq = itertools.count()
+        self._stats = {priority: QueueStats() for priority in PRIORITY_NAMES}
+
+    @property
+    def depth(self) -> int:
+        """Return the number of operations waiting for the device."""
+        return len(self._waiters)
+
+    def stats(self) -> dict:
+        """Return queue-wait metrics keyed by priority name."""
+        return {
+            PRIORITY_NAMES[priority]: stats.as_dict()
+            for priority, stats in self._stats.items()
+        }
+
+    @asynccontextmanager
+    async def slot(self, priority: int = PRIORITY_POLL):
+        """Wait for the device, then hold it until the block exits."""
+        start = time.monotonic()
+
+        if self._busy or self._waiters:
+            if len(self._waiters) >= self.max_depth:
+                self._stats[priority].rejected += 1
+                raise SchedulerFull(
+                    f"Too many pending operations ({len(self._waiters)})"
+                )
+
+            future = asyncio.get_running_loop().create_future()
+            waiter = [priority, next(self._seq), future]
+            heapq.heappush(self._waiters, waiter)
+            try:
+                await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    # Granted just before the cancellation landed; pass it on.
+                    self._release()
+                elif waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                    heapq.heapify(self._waiters)
+                raise
+        else:
+            self._busy = True
+
+        self._stats[priority].record(time.monotonic() - start)
+        try:
+            yield
+        finally:
+            self._release()
+
+    def _release(self) -> None:
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                # Hand the device straight to the next waiter; stay busy.
+                future.set_result(None)
+                return
+        self._busy = False
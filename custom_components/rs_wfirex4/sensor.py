@@ -4,63 +4,148 @@ import asyncio
 import logging
 import random
 import time
-from datetime import timedelta
+from dataclasses import dataclass
+from typing import NamedTuple
 
-from homeassistant.components.sensor import SensorDeviceClass, SensorEntity
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorEntityDescription,
+)
 from homeassistant.components.sensor.const import SensorStateClass
 from homeassistant.const import (
-    ATTR_ATTRIBUTION,
     CONF_HOST,
     CONF_MAC,
     CONF_NAME,
     LIGHT_LUX,
     PERCENTAGE,
+    EntityCategory,
     UnitOfTemperature,
+    UnitOfTime,
 )
-from homeassistant.helpers.device_registry import format_mac
+from homeassistant.helpers.device_registry import DeviceInfo, format_mac
 from homeassistant.helpers.update_coordinator import (
     CoordinatorEntity,
     DataUpdateCoordinator,
     UpdateFailed,
 )
 
-from .const import DOMAIN, PORT
-from .helpers import build_default_name_with_mac, build_device_info, resolve_ip_by_mac
+from .addresses import get_address_book
+from .codec import SENSOR_REQUEST, decode_sensor
+from .connection import Wfirex4Connection, read_frame
+from .const import (
+    CONF_ADAPTIVE_POLLING,
+    CONF_MAX_SCAN_INTERVAL,
+    DEFAULT_ADAPTIVE_POLLING,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    DOMAIN,
+    PORT,
+)
+from .helpers import (
+    build_default_name_with_mac,
+    build_device_info,
+    get_connection,
+    resolve_ip_by_mac,
+)
+from .metrics import Wfirex4Metrics
+from .poller import get_poll_engine
+from .scheduler import PRIORITY_POLL, SchedulerFull
+from .tracing import get_tracer, phase
 
 _LOGGER = logging.getLogger(__name__)
 CONF_ATTRIBUTION = ""
 
 # ---- Tuning knobs ----
-CONNECT_TIMEOUT = 4.0  # Intentionally short; on a LAN, ~3-6s is usually sufficient.
 READ_TIMEOUT = 4.0  # Response wait time; on a LAN, ~3-8s is typical.
 MAX_ATTEMPTS = 3  # First try + two retries.
 BACKOFF_BASE = 0.5  # 0.5s, 1.0s, 2.0s...
 BACKOFF_CAP = 2.0  # Cap the backoff to avoid waiting too long.
 JITTER = 0.2  # Small random jitter to avoid synchronized retries.
-MIN_LEN = 12  # Minimum response length required (we parse up to data[11]).
-
-# Sensor type list
-SENSOR_TYPES = {
-    "temperature": (
-        "Temperature",
-        UnitOfTemperature.CELSIUS,
-        SensorDeviceClass.TEMPERATURE,
-        SensorStateClass.MEASUREMENT,
+SCHEDULE_SLACK = 1.0  # Timer jitter tolerated by the scan_interval rate limit.
+STREAM_FALLBACK = 300.0  # Seconds of connect-per-poll after a streaming error.
+
+# ---- Adaptive polling ----
+# A reading is "stable" while the change expected over one interval, at its
+# recent rate, stays under this threshold.
+STABLE_DELTA = {"temperature": 0.2, "humidity": 1.0}
+LIGHT_JUMP_RATIO = 0.3  # Relative light change that counts as a jump...
+LIGHT_JUMP_MIN = 20  # ...provided it is at least this many lux.
+ADAPTIVE_GROWTH = 1.5  # Interval multiplier per stable poll.
+
+
+class SensorReadings(NamedTuple):
+    """Latest decoded (and offset-corrected) readings of one device."""
+
+    temperature: float
+    humidity: int
+    light: int
+    reliability: int
+
+
+# Sensor types; the descriptions are frozen and shared by every device.
+# `key` names the SensorReadings field the sensor shows.
+SENSOR_TYPES = (
+    SensorEntityDescription(
+        key="temperature",
+        name="Temperature",
+        native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+        device_class=SensorDeviceClass.TEMPERATURE,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    SensorEntityDescription(
+        key="humidity",
+        name="Humidity",
+        native_unit_of_measurement=PERCENTAGE,
+        device_class=SensorDeviceClass.HUMIDITY,
+        state_class=SensorStateClass.MEASUREMENT,
     ),
-    "humidity": (
-        "Humidity",
-        PERCENTAGE,
-        SensorDeviceClass.HUMIDITY,
-        SensorStateClass.MEASUREMENT,
+    SensorEntityDescription(
+        key="light",
+        name="Light",
+        native_unit_of_measurement=LIGHT_LUX,
+        device_class=SensorDeviceClass.ILLUMINANCE,
+        state_class=SensorStateClass.MEASUREMENT,
     ),
-    "light": (
-        "Light",
-        LIGHT_LUX,
-        SensorDeviceClass.ILLUMINANCE,
-        SensorStateClass.MEASUREMENT,
+    SensorEntityDescription(
+        key="reliability",
+        name="Reliability",
+        native_unit_of_measurement=PERCENTAGE,
+        device_class=SensorDeviceClass.POWER_FACTOR,
     ),
-    "reliability": ("Reliability", PERCENTAGE, SensorDeviceClass.POWER_FACTOR, None),
-}
+)
+
+
+@dataclass(frozen=True, kw_only=True)
+class WfirexMetricSensorDescription(SensorEntityDescription):
+    """Describe a diagnostic metric: which operation and which statistic."""
+
+    operation: str
+    statistic: str
+
+
+# Diagnostic metric sensors, keyed "<operation>_<statistic>".
+# Learning is left out; its total time is mostly the wait for a button press.
+METRIC_TYPES = tuple(
+    WfirexMetricSensorDescription(
+        key=f"{operation}_{statistic}",
+        name=f"{operation.capitalize()} {label}",
+        operation=operation,
+        statistic=statistic,
+        native_unit_of_measurement=unit,
+        device_class=device_class,
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+    )
+    for operation in ("poll", "send")
+    for statistic, label, unit, device_class in (
+        ("p50", "Latency p50", UnitOfTime.MILLISECONDS, SensorDeviceClass.DURATION),
+        ("p95", "Latency p95", UnitOfTime.MILLISECONDS, SensorDeviceClass.DURATION),
+        ("max", "Latency max", UnitOfTime.MILLISECONDS, SensorDeviceClass.DURATION),
+        ("retries_per_hour", "Retries per hour", "retries/h", None),
+        ("failure_rate", "Failure rate", PERCENTAGE, None),
+    )
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -83,7 +168,7 @@ async def async_setup_entry(hass, entry, async_add_entities):
     # Keep platform setup lightweight; avoid raising ConfigEntryNotReady here.
     coordinator = hass.data[DOMAIN]["coordinators"].get(mac)
     if coordinator is None:
-        # Fallback (should be rare): create a coordinator without forcing a first refresh here.
+        # Fallback (should be rare): create a coordinator and refresh it once here.
         scan_interval = opts.get("scan_interval", 60)
         fetcher = hass.data[DOMAIN]["fetchers"].get(mac) or Wfirex4Fetcher(
             host,
@@ -93,21 +178,37 @@ async def async_setup_entry(hass, entry, async_add_entities):
             scan_interval,
             entry,
             hass,
+            adaptive=opts.get(CONF_ADAPTIVE_POLLING, DEFAULT_ADAPTIVE_POLLING),
+            max_scan_interval=opts.get(
+                CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL
+            ),
         )
         hass.data[DOMAIN]["fetchers"].setdefault(mac, fetcher)
         coordinator = hass.data[DOMAIN]["coordinators"][mac] = DataUpdateCoordinator(
             hass,
             _LOGGER,
             name=name,
-            update_interval=timedelta(seconds=scan_interval),
             update_method=fetcher.get_sensor_data,
         )
-
-    # Create entities for each exposed sensor type.
-    entities = []
-    for sensor_type in SENSOR_TYPES.keys():
-        entities.append(WfirexCoordinatorSensor(coordinator, mac, name, sensor_type))
-    async_add_entities(entities, update_before_add=True)
+        get_poll_engine(hass).async_add(
+            mac, coordinator, scan_interval, fetcher.next_interval
+        )
+        await coordinator.async_refresh()
+
+    # Create entities for each exposed sensor type; they share one DeviceInfo.
+    device_info = build_device_info(mac, name)
+    entities = [
+        WfirexCoordinatorSensor(coordinator, description, mac, name, device_info)
+        for description in SENSOR_TYPES
+    ]
+    metrics = get_connection(hass, host, mac).metrics
+    entities.extend(
+        WfirexMetricSensor(coordinator, metrics, description, mac, name, device_info)
+        for description in METRIC_TYPES
+    )
+    # The coordinator already holds data (seeded by setup); adding with
+    # update_before_add would only trigger redundant refreshes.
+    async_add_entities(entities)
 
 
 async def async_update_entry_host(hass, entry, new_host: str):
@@ -124,53 +225,122 @@ async def async_update_entry_host(hass, entry, new_host: str):
 class WfirexCoordinatorSensor(CoordinatorEntity, SensorEntity):  # pyright: ignore[reportIncompatibleVariableOverride]
     """Representation of a WFIREX4 sensor managed via DataUpdateCoordinator."""
 
+    _attr_attribution = CONF_ATTRIBUTION
+
     def __init__(
         self,
         coordinator: DataUpdateCoordinator,
+        description: SensorEntityDescription,
         mac: str,
         name: str,
-        sensor_type: str,
+        device_info: DeviceInfo,
     ) -> None:
         """Initialize the WFIREX4 sensor entity.
 
         Args:
             coordinator: Shared data update coordinator.
+            description: Shared description of the sensor type.
             mac: MAC address of the device.
             name: User-defined device name (e.g. "Living").
-            sensor_type: Key identifying the type of sensor (e.g. "temperature").
+            device_info: Device registry info, shared by the device's entities.
         """
         super().__init__(coordinator)
-
-        self.type = sensor_type
+        self.entity_description = description
 
         # Entity name ("Living Temperature")
-        self._attr_name = f"{name} {SENSOR_TYPES[self.type][0]}"
+        self._attr_name = f"{name} {description.name}"
 
         # Unique ID ("wfirex4_112233_temperature")
-        mac_suffix = format_mac(mac)
-        self._attr_unique_id = f"wfirex4_{mac_suffix}_{self.type}"
+        self._attr_unique_id = f"wfirex4_{format_mac(mac)}_{description.key}"
 
         # Device registry
-        self._attr_device_info = build_device_info(mac, name)
-
-        # Sensor metadata
-        self._attr_native_unit_of_measurement = SENSOR_TYPES[self.type][1]
-        self._attr_device_class = SENSOR_TYPES[self.type][2]
-        self._attr_state_class = SENSOR_TYPES[self.type][3]
-        self._attr_extra_state_attributes = {ATTR_ATTRIBUTION: CONF_ATTRIBUTION}
+        self._attr_device_info = device_info
 
     @property
     def native_value(self) -> int | float | None:  # pyright: ignore[reportIncompatibleVariableOverride]
         """Return the latest sensor value from the coordinator."""
-        data = self.coordinator.data
-        if not data:
+        data: SensorReadings | None = self.coordinator.data
+        if data is None:
             return None
-        return data.get(self.type)
+        return getattr(data, self.entity_description.key)
+
+
+class WfirexMetricSensor(CoordinatorEntity, SensorEntity):  # pyright: ignore[reportIncompatibleVariableOverride]
+    """Diagnostic latency/error metric of one device, refreshed on each poll."""
+
+    entity_description: WfirexMetricSensorDescription
+
+    def __init__(
+        self,
+        coordinator: DataUpdateCoordinator,
+        metrics: Wfirex4Metrics,
+        description: WfirexMetricSensorDescription,
+        mac: str,
+        name: str,
+        device_info: DeviceInfo,
+    ) -> None:
+        """Initialize the metric sensor entity."""
+        super().__init__(coordinator)
+        self._metrics = metrics
+        self.entity_description = description
+
+        self._attr_name = f"{name} {description.name}"
+        self._attr_unique_id = f"wfirex4_{format_mac(mac)}_{description.key}"
+        self._attr_device_info = device_info
+
+    @property
+    def available(self) -> bool:  # pyright: ignore[reportIncompatibleVariableOverride]
+        """Stay available while polls fail; that is when metrics matter."""
+        return True
+
+    @property
+    def native_value(self) -> float | None:  # pyright: ignore[reportIncompatibleVariableOverride]
+        """Return the current value of the metric."""
+        statistic = self.entity_description.statistic
+        metrics = self._metrics.operations[self.entity_description.operation]
+        if statistic == "retries_per_hour":
+            return metrics.retries_per_hour
+        if statistic == "failure_rate":
+            return metrics.failure_rate
+        total = metrics.phases["total"]
+        if statistic == "max":
+            seconds = total.max if total.count else None
+        else:
+            seconds = total.percentile(int(statistic[1:]))
+        return None if seconds is None else round(seconds * 1000, 1)
+
+    @property
+    def extra_state_attributes(self) -> dict:  # pyright: ignore[reportIncompatibleVariableOverride]
+        """Return the per-phase breakdown and counters of the operation."""
+        return self._metrics.operations[self.entity_description.operation].as_dict()
 
 
 # ----------------------------------------------------------------------
 # Fetcher (rate-limited by scan_interval)
+async def _read_sensor_frame(reader: asyncio.StreamReader) -> bytes:
+    """Read a single response frame; the device keeps the connection open."""
+    return await read_frame(reader, READ_TIMEOUT)
+
+
 class Wfirex4Fetcher:
+    __slots__ = (
+        "data",
+        "hass",
+        "_host",
+        "_mac",
+        "_port",
+        "_temp_offset",
+        "_humi_offset",
+        "_scan_interval",
+        "_last_fetch_time",
+        "_entry",
+        "_adaptive",
+        "_max_scan_interval",
+        "_interval",
+        "_last_success_time",
+        "_stream_resume_at",
+    )
+
     def __init__(
         self,
         host,
@@ -180,8 +350,10 @@ class Wfirex4Fetcher:
         scan_interval=60,
         entry=None,
         hass=None,
+        adaptive=False,
+        max_scan_interval=None,
     ):
-        self.data = {}
+        self.data: SensorReadings | None = None
         self._host = host
         self._mac = mac
         self._port = PORT
@@ -189,9 +361,13 @@ class Wfirex4Fetcher:
         self._humi_offset = humi_offset
         self._scan_interval = scan_interval
         self._last_fetch_time = 0
-        self._lock = asyncio.Lock()
         self._entry = entry
         self.hass = hass
+        self._adaptive = adaptive
+        self._max_scan_interval = max(scan_interval, max_scan_interval or 0)
+        self._interval = scan_interval
+        self._last_success_time = 0.0
+        self._stream_resume_at = 0.0
 
     def apply_config(
         self,
@@ -202,6 +378,8 @@ class Wfirex4Fetcher:
         scan_interval: int,
         entry,
         hass,
+        adaptive: bool = False,
+        max_scan_interval: int | None = None,
     ) -> None:
         """Apply updated config/option values to an existing fetcher instance."""
         self._host = host
@@ -210,112 +388,177 @@ class Wfirex4Fetcher:
         self._scan_interval = scan_interval
         self._entry = entry
         self.hass = hass
+        self._adaptive = adaptive
+        self._max_scan_interval = max(scan_interval, max_scan_interval or 0)
+        self._interval = scan_interval
 
-    async def _fetch_once(self, host: str) -> bytes:
-        """Open a TCP connection, send a request, read the minimum response, then close."""
-        reader = writer = None
-        try:
-            reader, writer = await asyncio.wait_for(
-                asyncio.open_connection(host, self._port),
-                timeout=CONNECT_TIMEOUT,
+    def next_interval(self) -> float:
+        """Return the seconds to wait before the next poll."""
+        return self._interval if self._adaptive else self._scan_interval
+
+    def _adapt_interval(
+        self, previous: SensorReadings | None, elapsed: float
+    ) -> None:
+        """Lengthen the interval while readings are stable, reset it on change."""
+        if not self._adaptive or previous is None or elapsed <= 0:
+            self._interval = self._scan_interval
+            return
+
+        moving = False
+        stable = True
+        for key, threshold in STABLE_DELTA.items():
+            # Change expected over one interval at the observed rate.
+            change = abs(getattr(self.data, key) - getattr(previous, key))
+            expected = change / elapsed * self._interval
+            if expected >= threshold:
+                moving = True
+            elif expected >= threshold / 2:
+                stable = False
+
+        light, last_light = self.data.light, previous.light
+        if abs(light - last_light) >= max(
+            LIGHT_JUMP_MIN, LIGHT_JUMP_RATIO * last_light
+        ):
+            moving = True
+
+        if moving:
+            self._interval = self._scan_interval
+        elif stable:
+            self._interval = min(
+                self._interval * ADAPTIVE_GROWTH, self._max_scan_interval
             )
 
-            # Send a request frame.
-            writer.write(b"\xaa\x00\x01\x18\x50")
-            await writer.drain()
-
-            # Read only what we need; the device may keep the connection open.
-            data = b""
-            while len(data) < MIN_LEN:
-                chunk = await asyncio.wait_for(reader.read(1024), timeout=READ_TIMEOUT)
-                if not chunk:
-                    break
-                data += chunk
-
-            return data
-
-        finally:
-            if writer is not None:
-                try:
-                    writer.close()
-                    await writer.wait_closed()
-                except Exception as err:
+    @property
+    def streaming(self) -> bool:
+        """Return True while polls reuse the held connection."""
+        return time.monotonic() >= self._stream_resume_at
+
+    def _connection(self, host: str | None = None) -> Wfirex4Connection:
+        return get_connection(self.hass, host or self._host, self._mac)
+
+    async def _fetch_once(self, host: str) -> bytes:
+        """Send a sensor request on the shared connection and read its frame.
+
+        The socket stays open between polls (streaming). After an error the
+        fetcher polls on a short-lived socket of its own for STREAM_FALLBACK
+        seconds, leaving the shared one warm for IR sends.
+        """
+        return await self._connection(host).request(
+            SENSOR_REQUEST,
+            _read_sensor_frame,
+            PRIORITY_POLL,
+            keep_open=self.streaming,
+            idempotent=True,
+            host=host,
+            gate=get_poll_engine(self.hass).exchange_limit if self.hass else None,
+        )
+
+    def apply_frame(self, frame: bytes, host: str) -> SensorReadings:
+        """Decode a sensor response frame from `host` into the readings."""
+        with phase("parse"):
+            humi, temp, illu, acti = decode_sensor(frame)
+
+        previous = self.data
+        self.data = SensorReadings(
+            temperature=temp / 10 + self._temp_offset,
+            humidity=round(humi / 10 + self._humi_offset),
+            light=illu,
+            reliability=round(acti / 255.0 * 100.0),
+        )
+
+        if self.hass:
+            get_address_book(self.hass).async_remember(self._mac, host)
+
+        done = time.monotonic()
+        self._adapt_interval(previous, done - self._last_success_time)
+        self._last_success_time = done
+        return self.data
+
+    def seed(self, frame: bytes, host: str) -> SensorReadings:
+        """Take the frame the setup probe received as this interval's fetch."""
+        self._last_fetch_time = time.monotonic()
+        return self.apply_frame(frame, host)
+
+    async def get_sensor_data(self):
+        # No lock needed: the attempt time is recorded before the first await,
+        # so concurrent callers get the cached data while device access itself
+        # is serialized by the per-device scheduler.
+        now = time.monotonic()
+        if now - self._last_fetch_time < self._scan_interval - SCHEDULE_SLACK:
+            return self.data
+
+        # Record the attempt time. Even on failure, wait scan_interval to avoid hammering the device.
+        self._last_fetch_time = now
+
+        with get_tracer(self.hass, self._mac).trace("poll"):
+            return await self._async_fetch_with_retries()
+
+    async def _async_fetch_with_retries(self) -> SensorReadings:
+        host_to_connect = self._host
+        last_err = None
+        tried_resolve = False
+
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            if attempt > 1:
+                self._connection().metrics.record_retry("poll")
+            try:
+                frame = await self._fetch_once(host_to_connect)
+                if not frame:
+                    raise UpdateFailed("No response")
+                return self.apply_frame(frame, host_to_connect)
+
+            except asyncio.CancelledError:
+                # HA may cancel during shutdown or startup timeouts; do not swallow cancellation.
+                raise
+
+            except SchedulerFull as err:
+                # The device is saturated by other work; retrying only adds to the queue.
+                raise UpdateFailed(f"Device busy: {err}") from err
+
+            except Exception as err:
+                last_err = err
+                if self.streaming:
                     _LOGGER.debug(
-                        "Error closing WFIREX4 connection to %s:%s: %s",
-                        host,
-                        self._port,
+                        "Streaming poll of %s failed (%s); connecting per poll "
+                        "for %.0fs",
+                        self._mac,
                         err,
+                        STREAM_FALLBACK,
                     )
-
-    async def get_sensor_data(self):
-        async with self._lock:
-            now = time.monotonic()
-            if now - self._last_fetch_time < self._scan_interval:
-                return self.data
-
-            # Record the attempt time. Even on failure, wait scan_interval to avoid hammering the device.
-            self._last_fetch_time = now
-
-            host_to_connect = self._host
-            last_err = None
-            tried_resolve = False
-
-            for attempt in range(1, MAX_ATTEMPTS + 1):
-                try:
-                    data = await self._fetch_once(host_to_connect)
-
-                    if len(data) >= MIN_LEN and data[0:1] == b"\xaa":
-                        humi = int.from_bytes(data[5:7], byteorder="big")
-                        temp = int.from_bytes(data[7:9], byteorder="big")
-                        illu = int.from_bytes(data[9:11], byteorder="big")
-                        acti = int.from_bytes(data[11:12], byteorder="big")
-
-                        self.data["temperature"] = temp / 10 + self._temp_offset
-                        self.data["humidity"] = round(humi / 10 + self._humi_offset)
-                        self.data["light"] = illu
-                        self.data["reliability"] = round(acti / 255.0 * 100.0)
-                        return self.data
-
-                    raise UpdateFailed(f"Invalid/short response (len={len(data)})")
-
-                except asyncio.CancelledError:
-                    # HA may cancel during shutdown or startup timeouts; do not swallow cancellation.
-                    raise
-
-                except Exception as err:
-                    last_err = err
-
-                    # On the first failure only, try resolving a new IP from the MAC (handles IP changes elsewhere).
-                    if not tried_resolve:
-                        tried_resolve = True
-                        try:
-                            resolved_ip = await resolve_ip_by_mac(self.hass, self._mac)
-                        except Exception:
-                            resolved_ip = None
-
-                        if resolved_ip and resolved_ip != host_to_connect:
-                            host_to_connect = resolved_ip
-                            # If successful, persist the resolved IP back into the config entry.
-                            if self._entry and self.hass:
-                                try:
-                                    await self._update_entry_host(resolved_ip)
-                                except Exception:
-                                    pass
-                            self._host = resolved_ip
-                            # Retry immediately (no backoff) after switching to a new IP.
-                            continue
-
-                    # Light exponential backoff (+jitter) before the next retry.
-                    if attempt < MAX_ATTEMPTS:
-                        delay = min(BACKOFF_BASE * (2 ** (attempt - 1)), BACKOFF_CAP)
-                        delay += random.uniform(0, JITTER)
+                self._stream_resume_at = time.monotonic() + STREAM_FALLBACK
+
+                # On the first failure only, try resolving a new IP from the MAC (handles IP changes elsewhere).
+                if not tried_resolve:
+                    tried_resolve = True
+                    try:
+                        resolved_ip = await resolve_ip_by_mac(self.hass, self._mac)
+                    except Exception:
+                        resolved_ip = None
+
+                    if resolved_ip and resolved_ip != host_to_connect:
+                        host_to_connect = resolved_ip
+                        # If successful, persist the resolved IP back into the config entry.
+                        if self._entry and self.hass:
+                            try:
+                                await self._update_entry_host(resolved_ip)
+                            except Exception:
+                                pass
+                        self._host = resolved_ip
+                        # Retry immediately (no backoff) after switching to a new IP.
+                        continue
+
+                # Light exponential backoff (+jitter) before the next retry.
+                if attempt < MAX_ATTEMPTS:
+                    delay = min(BACKOFF_BASE * (2 ** (attempt - 1)), BACKOFF_CAP)
+                    delay += random.uniform(0, JITTER)
+                    with phase("backoff"):
                         await asyncio.sleep(delay)
 
-            # All attempts exhausted.
-            raise UpdateFailed(
-                f"Failed to fetch sensor data from {host_to_connect}:{self._port} "
-                f"after {MAX_ATTEMPTS} attempts. Last error: {last_err}"
-            )
+        # All attempts exhausted.
+        raise UpdateFailed(
+            f"Failed to fetch sensor data from {host_to_connect}:{self._port} "
+            f"after {MAX_ATTEMPTS} attempts. Last error: {last_err}"
+        )
 
     async def _update_entry_host(self, new_host: str):
         """Update the stored host (IP address) in the ConfigEntry."""
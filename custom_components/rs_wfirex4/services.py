@@ -0,0 +1,104 @@
+"""Domain-level services for the rs_wfirex4 integration."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+
+import homeassistant.helpers.config_validation as cv
+import voluptuous as vol
+from homeassistant.components.remote import (
+    ATTR_DELAY_SECS,
+    ATTR_DEVICE,
+    ATTR_NUM_REPEATS,
+    DEFAULT_DELAY_SECS,
+    DEFAULT_NUM_REPEATS,
+)
+from homeassistant.const import ATTR_COMMAND, ATTR_ENTITY_ID
+from homeassistant.core import HomeAssistant, ServiceCall, SupportsResponse
+from homeassistant.exceptions import ServiceValidationError
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+SERVICE_BROADCAST_COMMAND = "broadcast_command"
+
+ATTR_MAX_CONCURRENCY = "max_concurrency"
+DEFAULT_MAX_CONCURRENCY = 8
+
+BROADCAST_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_ENTITY_ID): cv.entity_ids,
+        vol.Required(ATTR_COMMAND): vol.All(
+            cv.ensure_list, [vol.All(cv.string, vol.Length(min=1))], vol.Length(min=1)
+        ),
+        vol.Optional(ATTR_DEVICE): vol.All(cv.string, vol.Length(min=1)),
+        vol.Optional(ATTR_NUM_REPEATS, default=DEFAULT_NUM_REPEATS): cv.positive_int,
+        vol.Optional(ATTR_DELAY_SECS, default=DEFAULT_DELAY_SECS): vol.Coerce(float),
+        vol.Optional(
+            ATTR_MAX_CONCURRENCY, default=DEFAULT_MAX_CONCURRENCY
+        ): vol.All(vol.Coerce(int), vol.Range(min=1)),
+    }
+)
+
+
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the integration's services (once per Home Assistant run)."""
+    if hass.services.has_service(DOMAIN, SERVICE_BROADCAST_COMMAND):
+        return
+
+    async def async_broadcast_command(call: ServiceCall):
+        """Send the same commands to many remotes, devices in parallel."""
+        remotes = hass.data.get(DOMAIN, {}).get("remotes", {})
+        # dict.fromkeys keeps the order and drops duplicate targets, so every
+        # device gets exactly one ordered batch.
+        entity_ids = list(dict.fromkeys(call.data[ATTR_ENTITY_ID]))
+        unknown = [entity_id for entity_id in entity_ids if entity_id not in remotes]
+        if unknown:
+            raise ServiceValidationError(
+                f"Not RS-WFIREX4 remote entities: {', '.join(unknown)}"
+            )
+
+        semaphore = asyncio.Semaphore(call.data[ATTR_MAX_CONCURRENCY])
+
+        async def send(entity_id: str) -> dict:
+            async with semaphore:
+                outcome = await remotes[entity_id].async_send_codes(
+                    call.data[ATTR_COMMAND],
+                    call.data.get(ATTR_DEVICE),
+                    call.data[ATTR_NUM_REPEATS],
+                    call.data[ATTR_DELAY_SECS],
+                )
+            failed = [
+                {"command": command, "error": str(err)}
+                for command, err in outcome
+                if err is not None
+            ]
+            return {"sent": len(outcome) - len(failed), "failed": failed}
+
+        results = await asyncio.gather(
+            *(send(entity_id) for entity_id in entity_ids), return_exceptions=True
+        )
+
+        response = {}
+        for entity_id, result in zip(entity_ids, results):
+            if isinstance(result, Exception):
+                _LOGGER.error("Broadcast to %s failed: %s", entity_id, result)
+                result = {
+                    "sent": 0,
+                    "failed": [{"command": None, "error": str(result)}],
+                }
+            response[entity_id] = result
+
+        if call.return_response:
+            return {"results": response}
+        return None
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_BROADCAST_COMMAND,
+        async_broadcast_command,
+        schema=BROADCAST_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
@@ -0,0 +1,124 @@
+"""Opt-in tracing of slow RS-WFIREX4 operations."""
+
+from __future__ import annotations
+
+import time
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+
+TRACE_BUFFER_SIZE = 50  # Slow traces kept per device.
+EVENT_SLOW_OPERATION = f"{DOMAIN}_slow_operation"
+
+# The trace of the operation running in the current task, if it is traced.
+# Tasks started inside an operation (e.g. the ack collector) inherit it.
+_current_trace: ContextVar[Trace | None] = ContextVar(
+    f"{DOMAIN}_trace", default=None
+)
+
+
+def get_tracer(hass: HomeAssistant, mac: str) -> Wfirex4Tracer:
+    """Return the tracer of a device; it starts out disabled."""
+    # Imported here because helpers imports this module (through connection).
+    from .helpers import get_device_object
+
+    return get_device_object(hass, "tracers", mac, Wfirex4Tracer, hass)
+
+
+def add_phase(name: str, seconds: float) -> None:
+    """Add time spent in a phase to the current trace, if any."""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add(name, seconds)
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Time the block as a phase of the current trace, if any."""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        trace.add(name, time.monotonic() - start)
+
+
+class Trace:
+    """Phase timings of one operation."""
+
+    __slots__ = ("operation", "started", "phases", "error")
+
+    def __init__(self, operation: str) -> None:
+        """Start an empty trace."""
+        self.operation = operation
+        self.started = datetime.now(timezone.utc)
+        self.phases: dict[str, float] = {}
+        self.error: str | None = None
+
+    def add(self, name: str, seconds: float) -> None:
+        """Accumulate time spent in a phase (phases may repeat)."""
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+
+class Wfirex4Tracer:
+    """Keep the slowest recent operations of one device.
+
+    Disabled while `threshold` is 0. When enabled, each traced operation
+    records its phases (throttle, queue, connect, drain, read, parse,
+    backoff, resolve); one that takes at least `threshold` seconds is kept in a
+    bounded ring buffer and announced as an EVENT_SLOW_OPERATION event.
+    Nested operations (e.g. a resolve during a poll) join the outer trace.
+    """
+
+    __slots__ = ("hass", "mac", "threshold", "slow")
+
+    def __init__(self, hass: HomeAssistant, mac: str) -> None:
+        """Initialize a disabled tracer."""
+        self.hass = hass
+        self.mac = mac
+        self.threshold = 0.0
+        self.slow: deque[dict] = deque(maxlen=TRACE_BUFFER_SIZE)
+
+    @contextmanager
+    def trace(self, operation: str) -> Iterator[None]:
+        """Trace the block as `operation` if tracing is enabled."""
+        if not self.threshold or _current_trace.get() is not None:
+            yield
+            return
+
+        trace = Trace(operation)
+        token = _current_trace.set(trace)
+        start = time.monotonic()
+        try:
+            yield
+        except Exception as err:
+            trace.error = repr(err)
+            raise
+        finally:
+            _current_trace.reset(token)
+            total = time.monotonic() - start
+            if total >= self.threshold:
+                self._keep(trace, total)
+
+    def _keep(self, trace: Trace, total: float) -> None:
+        record = {
+            "mac": self.mac,
+            "operation": trace.operation,
+            "started": trace.started.isoformat(),
+            "total_ms": round(total * 1000, 1),
+            "phases_ms": {
+                name: round(seconds * 1000, 1) for name, seconds in trace.phases.items()
+            },
+            "error": trace.error,
+        }
+        self.slow.append(record)
+        self.hass.bus.async_fire(EVENT_SLOW_OPERATION, record)
@@ -0,0 +1 @@
+"""Tests for the RS-WFIREX4 integration."""
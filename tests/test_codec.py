@@ -0,0 +1,91 @@
+"""Tests for the wire codec."""
+
+import os
+
+import pytest
+
+from custom_components.rs_wfirex4.codec import (
+    _CRC8_TABLE,
+    SENSOR_REQUEST,
+    FrameParser,
+    crc8,
+    encode_frame,
+    encode_ir_frame,
+)
+
+SENSOR_RESPONSE = encode_frame(bytes((0x18,)) + bytes(range(1, 10)))
+
+
+def _crc8_bytewise(data: bytes) -> int:
+    crc = 0
+    for byte in data:
+        crc = _CRC8_TABLE[crc ^ byte]
+    return crc
+
+
+def _feed_all(parser: FrameParser, data: bytes, chunk: int) -> list[bytes]:
+    frames = []
+    for pos in range(0, len(data), chunk):
+        frames += parser.feed(data[pos : pos + chunk])
+    return frames
+
+
+@pytest.mark.parametrize("size", [0, 1, 2, 127, 128, 129, 300, 1201])
+def test_crc8_matches_bytewise(size):
+    """The word-at-a-time path agrees with the plain table walk."""
+    data = os.urandom(size)
+    assert crc8(data) == _crc8_bytewise(data)
+    assert crc8(memoryview(bytearray(data))) == _crc8_bytewise(data)
+
+
+def test_sensor_request_constant():
+    """The request frame is the one the device has always been sent."""
+    assert SENSOR_REQUEST == b"\xaa\x00\x01\x18\x50"
+
+
+@pytest.mark.parametrize("chunk", [1, 3, 7, 64, 4096])
+def test_parser_splits_stream(chunk):
+    """Frames come out whole however the stream is chunked."""
+    frames = [encode_ir_frame(os.urandom(300)) for _ in range(20)]
+    parser = FrameParser()
+    assert _feed_all(parser, b"".join(frames), chunk) == frames
+    assert parser.pending == 0
+    assert parser.dropped == 0
+
+
+@pytest.mark.parametrize(
+    "garbage",
+    [
+        b"\x00",
+        b"\xaa",
+        b"\x00\xaa",
+        b"\xaa\x00",
+        b"\xaa\x00\x05",
+        b"\xaa\x00\x20",
+        b"\xaa\x00\x00",
+        b"\xaa\xff\xff",
+    ],
+)
+@pytest.mark.parametrize("chunk", [1, 4096])
+def test_parser_resyncs_after_stray_bytes(garbage, chunk):
+    """A stray start byte or length never hides the response behind it."""
+    parser = FrameParser()
+    assert _feed_all(parser, garbage + SENSOR_RESPONSE, chunk) == [SENSOR_RESPONSE]
+    assert parser.pending == 0
+
+
+def test_parser_drops_bad_crc():
+    """A corrupted frame is dropped and the next one still parses."""
+    corrupt = bytearray(SENSOR_RESPONSE)
+    corrupt[-1] ^= 0xFF
+    parser = FrameParser()
+    assert parser.feed(bytes(corrupt) + SENSOR_RESPONSE) == [SENSOR_RESPONSE]
+    assert parser.dropped == 1
+
+
+def test_parser_waits_for_incomplete_frame():
+    """A partial frame stays buffered until the rest arrives."""
+    parser = FrameParser()
+    assert parser.feed(SENSOR_RESPONSE[:-1]) == []
+    assert parser.pending == len(SENSOR_RESPONSE) - 1
+    assert parser.feed(SENSOR_RESPONSE[-1:]) == [SENSOR_RESPONSE]
@@ -0,0 +1,126 @@
+"""Tests for send_batch against a loopback device."""
+
+import asyncio
+import socket
+import struct
+
+from custom_components.rs_wfirex4.codec import (
+    CMD_SEND_IR,
+    FrameParser,
+    encode_frame,
+    encode_ir_frame,
+)
+from custom_components.rs_wfirex4.connection import Wfirex4Connection
+
+IR_ACK = encode_frame(bytes((CMD_SEND_IR, 0x00)))
+LINGER_RESET = struct.pack("ii", 1, 0)
+FRAMES = [encode_ir_frame(bytes((i,)) * 8) for i in range(3)]
+
+
+async def _serve(handle_frame):
+    """Start a device that calls `handle_frame(frame, writer)` per frame.
+
+    Return the server and the frames received, one list per connection.
+    """
+    connections = []
+
+    async def handle(reader, writer):
+        received = []
+        connections.append(received)
+        parser = FrameParser()
+        while chunk := await reader.read(4096):
+            for frame in parser.feed(chunk):
+                received.append(frame)
+                if not await handle_frame(frame, writer):
+                    writer.close()
+                    return
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, connections
+
+
+async def _send_batch(handle_frame, delay=0):
+    server, connections = await _serve(handle_frame)
+    port = server.sockets[0].getsockname()[1]
+    connection = Wfirex4Connection("127.0.0.1", "aa:bb", port)
+    try:
+        results = await asyncio.wait_for(
+            connection.send_batch(FRAMES, delay, ack_timeout=1), 5
+        )
+    finally:
+        await connection.async_close()
+        server.close()
+    return results, connections
+
+
+def test_send_batch_acknowledges_every_frame():
+    """All frames go out on one connection and are matched to their acks."""
+
+    async def ack(frame, writer):
+        writer.write(IR_ACK)
+        return True
+
+    results, connections = asyncio.run(_send_batch(ack))
+    assert results == [IR_ACK] * 3
+    assert connections == [FRAMES]
+
+
+def test_send_batch_does_not_replay_written_frames():
+    """A frame written before the device dropped the link is not resent."""
+
+    async def drop_second(frame, writer):
+        if frame == FRAMES[1]:
+            return False
+        writer.write(IR_ACK)
+        return True
+
+    # Frames go out 0.1s apart, so the drop is seen before the last one.
+    results, connections = asyncio.run(_send_batch(drop_second, delay=0.1))
+    assert results[0] == IR_ACK
+    assert isinstance(results[1], ConnectionError)
+    assert results[2] == IR_ACK
+    assert connections == [FRAMES[:2], FRAMES[2:]]
+
+
+class _TrustingConnection(Wfirex4Connection):
+    """A connection that has not noticed its socket was reset."""
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None
+
+
+def test_send_batch_retries_a_stale_socket():
+    """A held socket the device reset while idle is replaced, losing nothing."""
+
+    async def run():
+        resets = []
+
+        async def reset_after_first(frame, writer):
+            writer.write(IR_ACK)
+            if not resets:
+                # Abort with an RST rather than a FIN, as a rebooted unit does,
+                # once the client is idle again.
+                sock = writer.get_extra_info("socket")
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, LINGER_RESET)
+                resets.append(frame)
+                asyncio.get_running_loop().call_later(0.05, writer.transport.abort)
+            return True
+
+        server, connections = await _serve(reset_after_first)
+        port = server.sockets[0].getsockname()[1]
+        connection = _TrustingConnection("127.0.0.1", "aa:bb", port)
+        try:
+            assert await connection.send_batch(FRAMES[:1]) == [IR_ACK]
+            await asyncio.sleep(0.1)
+            results = await connection.send_batch(FRAMES, ack_timeout=1)
+        finally:
+            await connection.async_close()
+            server.close()
+        return results, connections, connection.metrics
+
+    results, connections, metrics = asyncio.run(run())
+    assert results == [IR_ACK] * 3
+    assert connections[-1] == FRAMES
+    assert metrics.operations["send"].retries == 1
@@ -0,0 +1,97 @@
+"""Tests for the per-device send limiter."""
+
+import pytest
+
+from custom_components.rs_wfirex4 import limiter as limiter_module
+from custom_components.rs_wfirex4.limiter import SendRateLimited, Wfirex4SendLimiter
+
+START = 1000.0
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Freeze time.monotonic() as seen by the limiter; advance via clock[0]."""
+    now = [START]
+    monkeypatch.setattr(limiter_module.time, "monotonic", lambda: now[0])
+    return now
+
+
+def _offsets(ready_at):
+    return [round(ready - START, 3) for ready in ready_at]
+
+
+def test_batch_uses_burst_on_idle_unit(clock):
+    """An idle unit sends the burst at once and paces the rest at the rate."""
+    limiter = Wfirex4SendLimiter(rate=4, burst=8, max_queue=16)
+    ready_at = limiter.reserve(10)
+    assert _offsets(ready_at) == [0.0] * 8 + [0.25, 0.5]
+    assert limiter.depth == 0
+
+
+def test_batch_keeps_its_delay(clock):
+    """Frames of a batch are never closer than the requested delay."""
+    limiter = Wfirex4SendLimiter(rate=4, burst=8, max_queue=16)
+    assert _offsets(limiter.reserve(3, delay=1.0)) == [0.0, 1.0, 2.0]
+
+
+def test_long_batch_on_idle_unit_is_paced_not_rejected(clock):
+    """A batch longer than the queue limit is fine when nothing else waits."""
+    limiter = Wfirex4SendLimiter(rate=4, burst=8, max_queue=16)
+    ready_at = limiter.reserve(100)
+    assert len(ready_at) == 100
+    assert limiter.depth == 0
+    assert limiter.dropped == 0
+
+
+def test_flood_is_queued_then_shed(clock):
+    """Sends behind others queue up to the limit; beyond it they are rejected."""
+    limiter = Wfirex4SendLimiter(rate=4, burst=2, max_queue=3)
+    limiter.reserve(2)  # The burst.
+    for _ in range(3):
+        limiter.reserve(1)
+    assert limiter.depth == 3
+    with pytest.raises(SendRateLimited, match="1 more frames would wait behind 3"):
+        limiter.reserve(1)
+    assert limiter.dropped == 1
+    assert limiter.depth == 3
+
+
+def test_queue_drains_over_time(clock):
+    """Queued frames leave the queue once their release time passes."""
+    limiter = Wfirex4SendLimiter(rate=4, burst=1, max_queue=8)
+    limiter.reserve(1)
+    limiter.reserve(1)
+    assert limiter.depth == 1
+    clock[0] += 1
+    assert limiter.depth == 0
+
+
+def test_release_and_refund_notify_listeners(clock):
+    """Listeners see every change of the queue depth."""
+    limiter = Wfirex4SendLimiter(rate=4, burst=1, max_queue=8)
+    depths = []
+    remove = limiter.add_listener(lambda: depths.append(limiter.depth))
+    limiter.reserve(1)
+    queued = limiter.reserve(2)
+    limiter.release(queued[0])
+    limiter.refund(queued[1:])
+    remove()
+    limiter.reserve(1)
+    assert depths == [2, 1, 0]
+    assert limiter.sent == 3
+
+
+def test_refund_returns_tokens(clock):
+    """Refunded frames free their place for the next send."""
+    limiter = Wfirex4SendLimiter(rate=4, burst=1, max_queue=8)
+    limiter.reserve(1)
+    queued = limiter.reserve(1)
+    limiter.refund(queued)
+    assert _offsets(limiter.reserve(1)) == _offsets(queued)
+
+
+def test_rate_zero_disables(clock):
+    """With a rate of 0 every frame may go at once (spaced by its delay)."""
+    limiter = Wfirex4SendLimiter(rate=0, burst=1, max_queue=0)
+    assert _offsets(limiter.reserve(50))[-1] == 0.0
+    assert limiter.depth == 0
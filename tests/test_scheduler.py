@@ -0,0 +1,151 @@
+"""Tests for the per-device scheduler."""
+
+import asyncio
+
+import pytest
+
+from custom_components.rs_wfirex4.scheduler import (
+    PRIORITY_LEARN,
+    PRIORITY_POLL,
+    PRIORITY_SEND,
+    SchedulerFull,
+    Wfirex4Scheduler,
+)
+
+
+async def _hold(scheduler, priority, order, name, release=None):
+    async with scheduler.slot(priority):
+        order.append(name)
+        if release is not None:
+            await release.wait()
+
+
+def test_grants_by_priority_then_arrival():
+    """Waiters run by priority, and in arrival order within one priority."""
+
+    async def run():
+        scheduler = Wfirex4Scheduler()
+        order = []
+        release = asyncio.Event()
+        holder = asyncio.create_task(
+            _hold(scheduler, PRIORITY_POLL, order, "holder", release)
+        )
+        await asyncio.sleep(0)
+        waiters = [
+            asyncio.create_task(_hold(scheduler, priority, order, name))
+            for priority, name in (
+                (PRIORITY_POLL, "poll"),
+                (PRIORITY_SEND, "send 1"),
+                (PRIORITY_LEARN, "learn"),
+                (PRIORITY_SEND, "send 2"),
+            )
+        ]
+        await asyncio.sleep(0)
+        assert scheduler.depth == 4
+        release.set()
+        await asyncio.gather(holder, *waiters)
+        return order
+
+    assert asyncio.run(run()) == ["holder", "send 1", "send 2", "learn", "poll"]
+
+
+def test_slots_never_overlap():
+    """At most one operation holds the device at a time."""
+
+    async def run():
+        scheduler = Wfirex4Scheduler()
+        active = 0
+        peak = 0
+
+        async def work(priority):
+            nonlocal active, peak
+            async with scheduler.slot(priority):
+                active += 1
+                peak = max(peak, active)
+                await asyncio.sleep(0)
+                active -= 1
+
+        await asyncio.gather(*(work(i % 3) for i in range(20)))
+        return peak
+
+    assert asyncio.run(run()) == 1
+
+
+def test_rejects_beyond_max_depth():
+    """A full queue refuses new operations and counts the rejection."""
+
+    async def run():
+        scheduler = Wfirex4Scheduler(max_depth=2)
+        release = asyncio.Event()
+        order = []
+        tasks = [
+            asyncio.create_task(_hold(scheduler, PRIORITY_POLL, order, i, release))
+            for i in range(3)
+        ]
+        await asyncio.sleep(0)
+        with pytest.raises(SchedulerFull):
+            async with scheduler.slot(PRIORITY_SEND):
+                pass
+        release.set()
+        await asyncio.gather(*tasks)
+        return scheduler.stats()
+
+    assert asyncio.run(run())["send"]["rejected"] == 1
+
+
+def test_cancelled_waiter_leaves_queue():
+    """A waiter cancelled in the queue is removed and never granted."""
+
+    async def run():
+        scheduler = Wfirex4Scheduler()
+        release = asyncio.Event()
+        order = []
+        holder = asyncio.create_task(
+            _hold(scheduler, PRIORITY_POLL, order, "holder", release)
+        )
+        await asyncio.sleep(0)
+        cancelled = asyncio.create_task(
+            _hold(scheduler, PRIORITY_SEND, order, "cancelled")
+        )
+        waiter = asyncio.create_task(_hold(scheduler, PRIORITY_POLL, order, "next"))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        await asyncio.sleep(0)
+        assert scheduler.depth == 1
+        release.set()
+        await asyncio.gather(holder, waiter)
+        return order
+
+    assert asyncio.run(run()) == ["holder", "next"]
+
+
+def test_grant_racing_cancellation_is_passed_on():
+    """A slot granted just as its waiter is cancelled goes to the next one."""
+
+    async def run():
+        scheduler = Wfirex4Scheduler()
+        order = []
+        tasks = {}
+
+        async def holder():
+            async with scheduler.slot(PRIORITY_POLL):
+                order.append("holder")
+                while scheduler.depth < 2:
+                    await asyncio.sleep(0)
+            # The slot was just granted to "first", which has not run yet.
+            tasks["first"].cancel()
+
+        holding = asyncio.create_task(holder())
+        await asyncio.sleep(0)
+        tasks["first"] = asyncio.create_task(
+            _hold(scheduler, PRIORITY_SEND, order, "first")
+        )
+        second = asyncio.create_task(_hold(scheduler, PRIORITY_POLL, order, "second"))
+        await asyncio.gather(holding, tasks["first"], return_exceptions=True)
+        # Without the hand-over, the device would stay busy forever.
+        await asyncio.wait_for(second, 1)
+        async with scheduler.slot(PRIORITY_POLL):
+            order.append("after")
+        return order, tasks["first"].cancelled()
+
+    assert asyncio.run(run()) == (["holder", "second", "after"], True)